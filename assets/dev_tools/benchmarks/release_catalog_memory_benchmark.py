@@ -0,0 +1,181 @@
+# Compares the memory held by a 300 release catalog built the old way (every full
+# /releases page kept in memory, release model without __slots__) with the new way
+# (pages trimmed as they are parsed, slotted release model with interned strings).
+# Run from the repo root: python assets/dev_tools/benchmarks/release_catalog_memory_benchmark.py
+import gc
+import os
+import sys
+import json
+import tracemalloc
+from dataclasses import dataclass
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../../src"))
+
+from ue4ss_installer_gui import release_cache, ue4ss  # noqa: E402
+
+
+RELEASE_COUNT = 300
+ASSETS_PER_RELEASE = 12
+PAGE_SIZE = 100
+
+
+@dataclass
+class OldReleaseTagAssetInfo:
+    file_name: str
+    download_link: str
+    created_at: str
+
+
+@dataclass
+class OldReleaseAssetInfo:
+    tag: str
+    is_prerelease: bool
+    is_latest: bool
+    has_assets: bool
+    created_at: str
+    assets: list[OldReleaseTagAssetInfo]
+
+
+def make_user(login: str) -> dict:
+    return {
+        "login": login,
+        "id": 1234567,
+        "node_id": "MDQ6VXNlcjEyMzQ1Njc=",
+        "avatar_url": f"https://avatars.githubusercontent.com/u/1234567?v=4&{login}",
+        "gravatar_id": "",
+        "url": f"https://api.github.com/users/{login}",
+        "html_url": f"https://github.com/{login}",
+        "followers_url": f"https://api.github.com/users/{login}/followers",
+        "following_url": f"https://api.github.com/users/{login}/following{{/other_user}}",
+        "gists_url": f"https://api.github.com/users/{login}/gists{{/gist_id}}",
+        "starred_url": f"https://api.github.com/users/{login}/starred{{/owner}}{{/repo}}",
+        "subscriptions_url": f"https://api.github.com/users/{login}/subscriptions",
+        "organizations_url": f"https://api.github.com/users/{login}/orgs",
+        "repos_url": f"https://api.github.com/users/{login}/repos",
+        "events_url": f"https://api.github.com/users/{login}/events{{/privacy}}",
+        "received_events_url": f"https://api.github.com/users/{login}/received_events",
+        "type": "User",
+        "site_admin": False,
+    }
+
+
+def make_release(index: int) -> dict:
+    tag = f"experimental-{index}"
+    download_url = f"https://github.com/UE4SS-RE/RE-UE4SS/releases/download/{tag}"
+    assets = []
+    for asset_index in range(ASSETS_PER_RELEASE):
+        name = f"UE4SS_v3.0.1-{index}-g{index:07x}_{asset_index}.zip"
+        assets.append(
+            {
+                "url": f"https://api.github.com/repos/UE4SS-RE/RE-UE4SS/releases/assets/{index}{asset_index}",
+                "id": index * 100 + asset_index,
+                "node_id": f"RA_kwDOHwQk4M4{index:08d}{asset_index}",
+                "name": name,
+                "label": "",
+                "uploader": make_user("github-actions[bot]"),
+                "content_type": "application/x-zip-compressed",
+                "state": "uploaded",
+                "size": 4_500_000 + asset_index,
+                "digest": f"sha256:{index:032x}{asset_index:032x}",
+                "download_count": 1000 + index,
+                "created_at": f"2024-01-01T00:{index % 60:02d}:{asset_index:02d}Z",
+                "updated_at": f"2024-01-01T00:{index % 60:02d}:{asset_index:02d}Z",
+                "browser_download_url": f"{download_url}/{name}",
+            }
+        )
+    return {
+        "url": f"https://api.github.com/repos/UE4SS-RE/RE-UE4SS/releases/{index}",
+        "assets_url": f"https://api.github.com/repos/UE4SS-RE/RE-UE4SS/releases/{index}/assets",
+        "upload_url": f"https://uploads.github.com/repos/UE4SS-RE/RE-UE4SS/releases/{index}/assets{{?name,label}}",
+        "html_url": f"https://github.com/UE4SS-RE/RE-UE4SS/releases/tag/{tag}",
+        "id": index,
+        "author": make_user("github-actions[bot]"),
+        "node_id": f"RE_kwDOHwQk4M4{index:08d}",
+        "tag_name": tag,
+        "target_commitish": "main",
+        "name": f"Experimental build {index}",
+        "draft": False,
+        "prerelease": index % 10 != 0,
+        "created_at": f"2024-01-{index % 28 + 1:02d}T00:00:{index % 60:02d}Z",
+        "published_at": f"2024-01-{index % 28 + 1:02d}T00:00:{index % 60:02d}Z",
+        "assets": assets,
+        "tarball_url": f"https://api.github.com/repos/UE4SS-RE/RE-UE4SS/tarball/{tag}",
+        "zipball_url": f"https://api.github.com/repos/UE4SS-RE/RE-UE4SS/zipball/{tag}",
+        "body": "## Changes\n"
+        + "".join(
+            f"- Fixed issue #{index * 10 + line} in the hook\n" for line in range(40)
+        ),
+        "reactions": {"total_count": 3, "+1": 2, "heart": 1, "rocket": 0},
+    }
+
+
+def make_page_texts() -> list[str]:
+    releases = [make_release(index) for index in range(RELEASE_COUNT)]
+    return [
+        json.dumps(releases[start : start + PAGE_SIZE])
+        for start in range(0, len(releases), PAGE_SIZE)
+    ]
+
+
+def build_old_catalog(page_texts: list[str]):
+    all_releases = []
+    for page_text in page_texts:
+        all_releases.extend(json.loads(page_text))
+    tags = [
+        OldReleaseAssetInfo(
+            tag=release["tag_name"],
+            is_prerelease=release["prerelease"],
+            is_latest=False,
+            has_assets=bool(release["assets"]),
+            created_at=release["created_at"],
+            assets=[
+                OldReleaseTagAssetInfo(
+                    file_name=asset["name"],
+                    download_link=asset["browser_download_url"],
+                    created_at=asset["created_at"],
+                )
+                for asset in release["assets"]
+            ],
+        )
+        for release in all_releases
+    ]
+    # the release cache kept the full pages alive next to the model
+    return all_releases, tags
+
+
+def build_new_catalog(page_texts: list[str]):
+    all_releases = []
+    for page_text in page_texts:
+        all_releases.extend(
+            release_cache.trim_release(release) for release in json.loads(page_text)
+        )
+    releases_info = ue4ss.build_repository_releases_info("o", "r", all_releases)
+    return all_releases, ue4ss.ReleaseCatalog(releases_info)
+
+
+def measure(build, page_texts: list[str]) -> tuple[int, int]:
+    gc.collect()
+    tracemalloc.start()
+    catalog = build(page_texts)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del catalog
+    return retained, peak
+
+
+def main():
+    page_texts = make_page_texts()
+    print(
+        f"{RELEASE_COUNT} releases, {ASSETS_PER_RELEASE} assets each, "
+        f"{sum(len(page_text) for page_text in page_texts) / 1024:.0f} KiB of JSON"
+    )
+    for label, build in (("old", build_old_catalog), ("new", build_new_catalog)):
+        retained, peak = measure(build, page_texts)
+        print(
+            f"{label}: {retained / 1024:8.0f} KiB retained, {peak / 1024:8.0f} KiB peak"
+        )
+
+
+if __name__ == "__main__":
+    main()
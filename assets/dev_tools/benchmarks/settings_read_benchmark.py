@@ -0,0 +1,85 @@
+# Compares reading a 500 game settings file with tomlkit (old read path) and the
+# stdlib toml parser (new read path), plus the cached SettingsStore read.
+# Run from the repo root: python assets/dev_tools/benchmarks/settings_read_benchmark.py
+import os
+import sys
+import timeit
+import tempfile
+
+import tomlkit
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    import tomli as tomllib
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "../../../src"))
+
+from ue4ss_installer_gui import settings_store  # noqa: E402
+
+
+GAME_COUNT = 500
+RUNS = 20
+
+
+def make_settings_toml(game_count: int) -> str:
+    games = tomlkit.aot()
+    for index in range(game_count):
+        game = tomlkit.table()
+        game["install_dir"] = f"C:\\SteamLibrary\\steamapps\\common\\Game {index}"
+        game["game_title"] = f"Game {index}"
+        game["ue4ss_version"] = "v3.0.1"
+        game["last_installed_version"] = "UE4SS_v3.0.1.zip"
+        game["platform"] = "Steam"
+        game["using_developer_version"] = False
+        game["show_pre_releases"] = False
+        game["using_portable_version"] = False
+        game["using_keep_mods_and_settings"] = True
+        games.append(game)
+
+    document = tomlkit.document()
+    document["games"] = games
+    gui = tomlkit.table()
+    gui["language"] = "en"
+    gui["use_custom_font"] = False
+    document["GUI"] = gui
+    return tomlkit.dumps(document)
+
+
+def main():
+    toml_str = make_settings_toml(GAME_COUNT)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        settings_file = os.path.join(temp_dir, "settings.toml")
+        with open(settings_file, "w", encoding="utf-8") as f:
+            f.write(toml_str)
+
+        def read_with_tomlkit():
+            with open(settings_file, "r", encoding="utf-8") as f:
+                tomlkit.load(f).unwrap()
+
+        def read_with_tomllib():
+            with open(settings_file, "rb") as f:
+                tomllib.load(f)
+
+        store = settings_store.SettingsStore(
+            settings_file, lambda data, document: tomlkit.dumps(data)
+        )
+        store.get()
+
+        results = {
+            "tomlkit load": timeit.timeit(read_with_tomlkit, number=RUNS) / RUNS,
+            "tomllib load": timeit.timeit(read_with_tomllib, number=RUNS) / RUNS,
+            "SettingsStore.get (cached)": timeit.timeit(store.get, number=RUNS) / RUNS,
+        }
+
+    print(f"{GAME_COUNT} games, {len(toml_str) / 1024:.0f} KiB, {RUNS} runs each")
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1000:8.3f} ms")
+    print(
+        f"tomllib is {results['tomlkit load'] / results['tomllib load']:.1f}x faster than tomlkit"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# Local stand in for the GitHub releases API that serves recorded fixtures, so the
+# release fetching can be exercised without network access or rate limits.
+# Pages are served with ETag and Link headers like GitHub's and If-None-Match gets
+# a 304, every request is printed.
+#
+# Record a fixture once:
+#   curl "https://api.github.com/repos/UE4SS-RE/RE-UE4SS/releases?per_page=100&page=1" > releases.json
+# (repeat for every page and concatenate the arrays), then run from the repo root:
+#   python assets/dev_tools/github_releases_stand_in.py releases.json --port 8765
+# and set github_api_url = "http://127.0.0.1:8765" in the GUI section of settings.toml.
+import sys
+import json
+import hashlib
+import argparse
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def make_handler(releases: list[dict]):
+    class ReleasesHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed_url = urllib.parse.urlparse(self.path)
+            if not parsed_url.path.endswith("/releases"):
+                self.send_error(404)
+                return
+            query = urllib.parse.parse_qs(parsed_url.query)
+            page = int(query.get("page", ["1"])[0])
+            per_page = int(query.get("per_page", ["30"])[0])
+            page_count = max(1, -(-len(releases) // per_page))
+
+            body = json.dumps(releases[(page - 1) * per_page : page * per_page]).encode(
+                "utf-8"
+            )
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("ETag", etag)
+            if page_count > 1:
+                base_url = f"http://{self.headers.get('Host')}{parsed_url.path}"
+                links = [
+                    f'<{base_url}?per_page={per_page}&page={link_page}>; rel="{rel}"'
+                    for rel, link_page in (
+                        ("next", page + 1),
+                        ("last", page_count),
+                        ("first", 1),
+                        ("prev", page - 1),
+                    )
+                    if 1 <= link_page <= page_count
+                ]
+                self.send_header("Link", ", ".join(links))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return ReleasesHandler
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("fixture", help="json array of releases, newest first")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    with open(args.fixture, "r", encoding="utf-8") as file:
+        releases = json.load(file)
+
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), make_handler(releases))
+    print(f"Serving {len(releases)} releases on http://127.0.0.1:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
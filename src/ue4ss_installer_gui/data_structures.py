@@ -1,7 +1,7 @@
 from enum import Enum
-from typing import List, Type, Any
+from typing import Type, Any, Optional
 from pathlib import Path
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 
 
 class GamePlatforms(Enum):
@@ -21,7 +21,13 @@ class GameInfo:
     show_pre_releases: bool
     using_portable_version: bool
     using_keep_mods_and_settings: bool
-    installed_files: List[Path] = field(default_factory=list)
+
+
+@dataclass
+class InstallManifestEntry:
+    path: str
+    size: Optional[int] = None
+    crc: Optional[int] = None
 
 
 def get_enum_from_val(enum_cls: Type[Enum], value: Any) -> Enum:
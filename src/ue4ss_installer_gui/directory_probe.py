@@ -0,0 +1,124 @@
+import os
+import pathlib
+import threading
+import contextlib
+from typing import Iterator, Optional, Union
+
+
+DirectoryEntries = dict[str, tuple[str, bool, bool]]
+
+
+class DirectoryProbe:
+    """
+    Lists each directory once with os.scandir and answers is_dir/is_file questions from
+    the cached listings, so the Unreal and UE4SS checks that run against the same
+    directories during a scan share their filesystem work. Meant to live for one scan,
+    listings are never refreshed. Safe to share between scan worker threads, two
+    threads may race to list the same directory but both get the same answer.
+    """
+
+    def __init__(self):
+        self._listings: dict[str, Optional[DirectoryEntries]] = {}
+        self.scandir_calls = 0
+        self._lock = threading.Lock()
+        self._thread_state = threading.local()
+
+    def get_entries(
+        self, directory: Union[str, pathlib.Path]
+    ) -> Optional[DirectoryEntries]:
+        """
+        Returns the entries of directory keyed by normcased name, as
+        (name, is_dir, is_symlink) tuples, or None if it is not a readable directory.
+        """
+        directory_key = os.path.normpath(str(directory))
+        for listed_dirs in getattr(self._thread_state, "recorders", ()):
+            listed_dirs.add(directory_key)
+
+        if directory_key in self._listings:
+            return self._listings[directory_key]
+
+        with self._lock:
+            self.scandir_calls += 1
+
+        entries = None
+        try:
+            with os.scandir(directory_key) as scanned_entries:
+                entries = {}
+                for entry in scanned_entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    entries[os.path.normcase(entry.name)] = (
+                        entry.name,
+                        is_dir,
+                        entry.is_symlink(),
+                    )
+        except OSError:
+            entries = None
+
+        self._listings[directory_key] = entries
+        return entries
+
+    @contextlib.contextmanager
+    def record_listed_dirs(self) -> Iterator[set[str]]:
+        """
+        Collects every directory the current thread looks at inside the block, cached
+        or not, so callers know which directories a result depends on.
+        """
+        recorders = getattr(self._thread_state, "recorders", None)
+        if recorders is None:
+            recorders = self._thread_state.recorders = []
+        listed_dirs: set[str] = set()
+        recorders.append(listed_dirs)
+        try:
+            yield listed_dirs
+        finally:
+            recorders.pop()
+
+    def _get_entry(
+        self, path: Union[str, pathlib.Path]
+    ) -> Optional[tuple[str, bool, bool]]:
+        parent, name = os.path.split(os.path.normpath(str(path)))
+        if not name:
+            return None
+        entries = self.get_entries(parent)
+        if entries is None:
+            return None
+        return entries.get(os.path.normcase(name))
+
+    def is_dir(self, path: Union[str, pathlib.Path]) -> bool:
+        if not os.path.basename(os.path.normpath(str(path))):
+            # roots like C:\ have no parent listing to look in
+            return self.get_entries(path) is not None
+        entry = self._get_entry(path)
+        return entry is not None and entry[1]
+
+    def is_file(self, path: Union[str, pathlib.Path]) -> bool:
+        entry = self._get_entry(path)
+        return entry is not None and not entry[1]
+
+    def get_sub_dirs(
+        self, directory: Union[str, pathlib.Path], follow_symlinks: bool = True
+    ) -> list[pathlib.Path]:
+        entries = self.get_entries(directory)
+        if entries is None:
+            return []
+        directory = pathlib.Path(directory)
+        return [
+            directory / name
+            for name, is_dir, is_symlink in entries.values()
+            if is_dir and (follow_symlinks or not is_symlink)
+        ]
+
+    def has_file_with_suffix(
+        self, directory: Union[str, pathlib.Path], suffix: str
+    ) -> bool:
+        entries = self.get_entries(directory)
+        if entries is None:
+            return False
+        suffix = os.path.normcase(suffix.lower())
+        return any(
+            not is_dir and name_key.lower().endswith(suffix)
+            for name_key, (_, is_dir, _) in entries.items()
+        )
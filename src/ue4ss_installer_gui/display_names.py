@@ -0,0 +1,94 @@
+import os
+import re
+import json
+import glob
+from collections.abc import Mapping
+from typing import Iterable, Optional
+
+from ue4ss_installer_gui import logger
+
+
+class DisplayNameResolver:
+    """
+    Maps install dirs to friendly display names. The sub paths are compiled into one
+    regex, when several sub paths occur in an install dir the one listed first wins,
+    matching the old loop over the override table. Results are memoized per install dir.
+    """
+
+    def __init__(self, paths_to_display_names: Mapping[str, str]):
+        self._sub_path_priorities = {
+            sub_path: priority
+            for priority, sub_path in enumerate(paths_to_display_names)
+        }
+        self._display_names = list(paths_to_display_names.values())
+        self._pattern = None
+        if paths_to_display_names:
+            # the lookahead lets finditer report a match starting at every position
+            alternatives = "|".join(re.escape(path) for path in paths_to_display_names)
+            self._pattern = re.compile(f"(?=({alternatives}))")
+        self._resolved_names: dict[str, Optional[str]] = {}
+
+    def resolve(self, install_dir: str) -> Optional[str]:
+        """
+        Returns the display name override for install_dir, or None when there is none.
+        """
+        if install_dir in self._resolved_names:
+            return self._resolved_names[install_dir]
+
+        best_priority = None
+        if self._pattern is not None:
+            for match in self._pattern.finditer(install_dir):
+                priority = self._sub_path_priorities[match.group(1)]
+                if best_priority is None or priority < best_priority:
+                    best_priority = priority
+                    if priority == 0:
+                        break
+
+        display_name = (
+            None if best_priority is None else self._display_names[best_priority]
+        )
+        self._resolved_names[install_dir] = display_name
+        return display_name
+
+    def get_display_name(self, install_dir: str, default: str) -> str:
+        display_name = self.resolve(install_dir)
+        return default if display_name is None else display_name
+
+
+def load_display_name_override_files(file_paths: Iterable[str]) -> dict[str, str]:
+    """
+    Reads user override files, json objects of install dir sub paths to display names.
+    """
+    paths_to_display_names = {}
+    for file_path in file_paths:
+        try:
+            with open(file_path, "r", encoding="utf-8") as file:
+                overrides = json.load(file)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.log_message(f"Skipping display name override file {file_path}: {e}")
+            continue
+
+        if not isinstance(overrides, dict):
+            logger.log_message(
+                f"Skipping display name override file {file_path}: expected a json object"
+            )
+            continue
+
+        for sub_path, display_name in overrides.items():
+            paths_to_display_names.setdefault(
+                os.path.normpath(sub_path), str(display_name)
+            )
+    return paths_to_display_names
+
+
+def make_display_name_resolver(
+    builtin_paths_to_display_names: Mapping[str, str], overrides_dir: str
+) -> DisplayNameResolver:
+    """
+    User overrides from overrides_dir/*.json take priority over the built in table.
+    """
+    override_files = sorted(glob.glob(os.path.join(overrides_dir, "*.json")))
+    paths_to_display_names = load_display_name_override_files(override_files)
+    for sub_path, display_name in builtin_paths_to_display_names.items():
+        paths_to_display_names.setdefault(sub_path, display_name)
+    return DisplayNameResolver(paths_to_display_names)
@@ -1,15 +1,202 @@
 import os
+import glob
+import json
 import pathlib
+from dataclasses import dataclass
+from typing import Iterable, Optional
 
-from ue4ss_installer_gui import file_io
+from ue4ss_installer_gui import logger, settings, game_registry, mounts
 
 
-def get_all_epic_games_game_directories() -> list[pathlib.Path]:
-    epic_games_games_directories = []
-    for drive_letter in file_io.get_all_drive_letter_paths():
-        epic_games_games_directory = os.path.normpath(
-            f"{drive_letter}Program Files/Epic Games"
+@dataclass
+class EpicGameInstall:
+    app_name: str
+    title: str
+    install_dir: pathlib.Path
+
+
+# installs from the last discovery pass, keyed by canonical game dir
+cached_epic_game_installs: dict[str, EpicGameInstall] = {}
+
+
+def read_json_file(json_path: str) -> Optional[object]:
+    try:
+        with open(json_path, "r", encoding="utf-8-sig") as file:
+            return json.load(file)
+    except (OSError, ValueError) as e:
+        logger.log_message(f"Skipping unreadable launcher manifest {json_path}: {e}")
+        return None
+
+
+def get_default_program_data_dir() -> str:
+    return os.environ.get("PROGRAMDATA", os.path.normpath("C:/ProgramData"))
+
+
+def get_epic_launcher_item_installs(program_data_dir: str) -> list[EpicGameInstall]:
+    """
+    Installs from the Epic Games Launcher's per game .item manifests, incomplete
+    installs are skipped.
+    """
+    installs = []
+    item_paths = sorted(
+        glob.glob(
+            os.path.join(
+                program_data_dir,
+                "Epic",
+                "EpicGamesLauncher",
+                "Data",
+                "Manifests",
+                "*.item",
+            )
+        )
+    )
+    for item_path in item_paths:
+        item = read_json_file(item_path)
+        if not isinstance(item, dict) or item.get("bIsIncompleteInstall", False):
+            continue
+        install_location = item.get("InstallLocation")
+        if not install_location:
+            continue
+        installs.append(
+            EpicGameInstall(
+                app_name=item.get("AppName", ""),
+                title=item.get("DisplayName", ""),
+                install_dir=pathlib.Path(os.path.normpath(install_location)),
+            )
+        )
+    return installs
+
+
+def get_epic_launcher_installed_dat_installs(
+    program_data_dir: str,
+) -> list[EpicGameInstall]:
+    """
+    Installs from LauncherInstalled.dat, which lists every install but without titles.
+    """
+    launcher_installed_path = os.path.join(
+        program_data_dir, "Epic", "UnrealEngineLauncher", "LauncherInstalled.dat"
+    )
+    if not os.path.isfile(launcher_installed_path):
+        return []
+    launcher_installed = read_json_file(launcher_installed_path)
+    if not isinstance(launcher_installed, dict):
+        return []
+
+    installs = []
+    for installation in launcher_installed.get("InstallationList", []):
+        install_location = installation.get("InstallLocation")
+        if not install_location:
+            continue
+        installs.append(
+            EpicGameInstall(
+                app_name=installation.get("AppName", ""),
+                title="",
+                install_dir=pathlib.Path(os.path.normpath(install_location)),
+            )
         )
-        if os.path.isdir(epic_games_games_directory):
-            epic_games_games_directories.append(epic_games_games_directory)
-    return epic_games_games_directories
+    return installs
+
+
+def get_legendary_installed_json_paths() -> list[str]:
+    """
+    installed.json databases of Legendary and of Heroic's bundled Legendary, including
+    the Flatpak install of Heroic.
+    """
+    config_home = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
+    return [
+        os.path.join(config_home, "legendary", "installed.json"),
+        os.path.join(
+            config_home, "heroic", "legendaryConfig", "legendary", "installed.json"
+        ),
+        os.path.expanduser(
+            "~/.var/app/com.heroicgameslauncher.hgl/config/heroic/legendaryConfig/legendary/installed.json"
+        ),
+    ]
+
+
+def get_legendary_installs(
+    installed_json_paths: Iterable[str],
+) -> list[EpicGameInstall]:
+    installs = []
+    for installed_json_path in installed_json_paths:
+        if not os.path.isfile(installed_json_path):
+            continue
+        installed_games = read_json_file(installed_json_path)
+        if not isinstance(installed_games, dict):
+            continue
+        for app_name, installed_game in installed_games.items():
+            if not isinstance(installed_game, dict) or installed_game.get("is_dlc"):
+                continue
+            install_path = installed_game.get("install_path")
+            if not install_path:
+                continue
+            installs.append(
+                EpicGameInstall(
+                    app_name=app_name,
+                    title=installed_game.get("title", ""),
+                    install_dir=pathlib.Path(os.path.normpath(install_path)),
+                )
+            )
+    return installs
+
+
+def get_all_epic_game_installs(
+    program_data_dir: Optional[str] = None,
+    legendary_installed_json_paths: Optional[Iterable[str]] = None,
+) -> list[EpicGameInstall]:
+    """
+    Exact install locations from launcher manifests, .item manifests come first as
+    they carry titles. Duplicates of the same install dir are dropped.
+    """
+    installs = []
+    if settings.is_windows() or program_data_dir is not None:
+        if program_data_dir is None:
+            program_data_dir = get_default_program_data_dir()
+        installs.extend(get_epic_launcher_item_installs(program_data_dir))
+        installs.extend(get_epic_launcher_installed_dat_installs(program_data_dir))
+    if not settings.is_windows() or legendary_installed_json_paths is not None:
+        if legendary_installed_json_paths is None:
+            legendary_installed_json_paths = get_legendary_installed_json_paths()
+        installs.extend(get_legendary_installs(legendary_installed_json_paths))
+
+    unique_installs = {}
+    for install in installs:
+        unique_installs.setdefault(
+            game_registry.get_canonical_game_dir_key(install.install_dir), install
+        )
+    return list(unique_installs.values())
+
+
+def get_all_epic_games_game_directories(
+    runner: Optional[mounts.MountAwareRunner] = None,
+) -> list[pathlib.Path]:
+    """
+    Install dirs of every Epic game that exist, dirs on mounts that do not answer
+    within the runner's deadline are left out.
+    """
+    global cached_epic_game_installs
+    epic_game_installs = {}
+    for install in get_all_epic_game_installs():
+        if runner is None:
+            is_install_dir = install.install_dir.is_dir()
+        else:
+            is_install_dir = runner.call(
+                install.install_dir, install.install_dir.is_dir, False
+            )
+        if not is_install_dir:
+            continue
+        epic_game_installs[
+            game_registry.get_canonical_game_dir_key(install.install_dir)
+        ] = install
+
+    cached_epic_game_installs = epic_game_installs
+    return [install.install_dir for install in epic_game_installs.values()]
+
+
+def get_epic_game_title_for_game_dir(game_directory: pathlib.Path) -> Optional[str]:
+    install = cached_epic_game_installs.get(
+        game_registry.get_canonical_game_dir_key(game_directory)
+    )
+    if install is None:
+        return None
+    return install.title or os.path.basename(os.path.normpath(str(install.install_dir)))
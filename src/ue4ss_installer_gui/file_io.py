@@ -3,6 +3,9 @@ import sys
 import pathlib
 import requests
 import zipfile
+import tempfile
+
+from ue4ss_installer_gui import data_structures
 
 
 SCRIPT_DIR = (
@@ -52,6 +55,22 @@ def get_paths_of_files_in_zip(zip_file: pathlib.Path) -> list[str]:
     return paths_of_files_in_zip
 
 
+def get_install_manifest_entries_from_zip(
+    zip_file: pathlib.Path,
+) -> list[data_structures.InstallManifestEntry]:
+    """
+    Lists the files in a zip with the size and CRC recorded in its central directory.
+    """
+    with zipfile.ZipFile(zip_file, "r") as zip_ref:
+        return [
+            data_structures.InstallManifestEntry(
+                path=info.filename, size=info.file_size, crc=info.CRC
+            )
+            for info in zip_ref.infolist()
+            if not info.is_dir()
+        ]
+
+
 def get_contents_of_file(file_path: str) -> str:
     with open(file_path, "r", encoding="utf-8-sig") as file:
         return file.read()
@@ -60,3 +79,24 @@ def get_contents_of_file(file_path: str) -> str:
 def save_content_to_file(content: str, file_path: str):
     with open(file_path, "w", encoding="utf-8") as file:
         file.write(content)
+
+
+def write_file_atomically(content: str, file_path: str):
+    """
+    Writes to a temp file next to file_path, fsyncs it, then renames it over file_path,
+    so readers never see a partially written file.
+    """
+    directory = os.path.dirname(os.path.abspath(file_path))
+    file_descriptor, temp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(file_descriptor, "w", encoding="utf-8") as file:
+            file.write(content)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, file_path)
+    except BaseException:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+        raise
@@ -0,0 +1,66 @@
+import os
+import pathlib
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Iterable, Iterator, Optional, Union
+
+
+GameDirectory = Union[str, pathlib.Path]
+
+
+def get_canonical_game_dir_key(game_directory: GameDirectory) -> str:
+    return os.path.normcase(os.path.normpath(str(game_directory)))
+
+
+class GameRegistry:
+    """
+    Game entries from the settings file indexed by their canonical install dir, so
+    lookups, upserts and deletes do not have to walk the games array.
+    """
+
+    def __init__(self, game_entries: Iterable[Mapping] = ()):
+        self._entries: dict[str, Any] = {}
+        for game_entry in game_entries:
+            game_key = get_canonical_game_dir_key(game_entry.get("install_dir", ""))
+            # the first entry wins, matching the old linear scans
+            self._entries.setdefault(game_key, game_entry)
+
+    def __contains__(self, game_directory: object) -> bool:
+        if not isinstance(game_directory, (str, pathlib.Path)):
+            return False
+        return get_canonical_game_dir_key(game_directory) in self._entries
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, game_directory: GameDirectory) -> Optional[Any]:
+        return self._entries.get(get_canonical_game_dir_key(game_directory))
+
+    def upsert(self, game_entry: dict):
+        """
+        Updates the entry with the same install dir in place, or appends a new one.
+        """
+        game_key = get_canonical_game_dir_key(game_entry["install_dir"])
+        existing_entry = self._entries.get(game_key)
+        if isinstance(existing_entry, MutableMapping):
+            existing_entry.update(game_entry)
+        else:
+            self._entries[game_key] = game_entry
+
+    def upsert_many(self, game_entries: Iterable[dict]):
+        for game_entry in game_entries:
+            self.upsert(game_entry)
+
+    def delete(self, game_directory: GameDirectory) -> bool:
+        return (
+            self._entries.pop(get_canonical_game_dir_key(game_directory), None)
+            is not None
+        )
+
+    def delete_many(self, game_directories: Iterable[GameDirectory]) -> int:
+        return sum(self.delete(game_directory) for game_directory in game_directories)
+
+    def to_list(self) -> list:
+        return list(self._entries.values())
@@ -0,0 +1,487 @@
+import os
+import functools
+import time
+import pathlib
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, Optional, TypeVar, Union
+
+from ue4ss_installer_gui import (
+    logger,
+    settings,
+    steam,
+    epic,
+    unreal_engine,
+    ue4ss,
+    game_registry,
+    directory_probe,
+    scan_cache,
+    mounts,
+)
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+SCAN_EVENT_GAME_FOUND = "game_found"
+SCAN_EVENT_GAME_REMOVED = "game_removed"
+
+# how often a running scan checks its cancel event while no task finishes
+SCAN_CANCEL_POLL_SECONDS = 0.1
+
+
+@dataclass
+class ScanRootResult:
+    source: str
+    root_dir: str
+    game_dirs: list[str] = field(default_factory=list)
+    seconds: float = 0.0
+    error: Optional[str] = None
+    timed_out: bool = False
+    visited_entry_count: int = 0
+    budget_exhausted: bool = False
+
+
+@dataclass
+class ScanReport:
+    worker_count: int
+    root_results: list[ScanRootResult] = field(default_factory=list)
+    source_seconds: dict[str, float] = field(default_factory=dict)
+    timed_out_paths: list[str] = field(default_factory=list)
+    listed_root_count: int = 0
+    unique_root_count: int = 0
+    listed_candidate_count: int = 0
+    unique_candidate_count: int = 0
+    seconds: float = 0.0
+
+    @property
+    def dedup_ratio(self) -> float:
+        """
+        Share of listed roots and candidates dropped as duplicates before probing.
+        """
+        listed_count = self.listed_root_count + self.listed_candidate_count
+        if listed_count == 0:
+            return 0.0
+        unique_count = self.unique_root_count + self.unique_candidate_count
+        return (listed_count - unique_count) / listed_count
+
+    def get_game_dirs(self) -> list[str]:
+        """
+        Game dirs in scan root order, independent of which worker finished first.
+        """
+        game_dirs = []
+        for root_result in self.root_results:
+            game_dirs.extend(root_result.game_dirs)
+        return game_dirs
+
+    def log(self, slowest_root_count: int = 5):
+        logger.log_message(
+            f"Scanned {len(self.root_results)} roots with {self.worker_count} workers "
+            f"in {self.seconds:.2f}s"
+        )
+        for source, seconds in self.source_seconds.items():
+            logger.log_message(f"  {source} roots listed in {seconds:.2f}s")
+        logger.log_message(
+            f"  {self.unique_root_count}/{self.listed_root_count} roots and "
+            f"{self.unique_candidate_count}/{self.listed_candidate_count} candidates "
+            f"unique, {self.dedup_ratio:.0%} dropped as duplicates"
+        )
+        slowest_roots = sorted(
+            self.root_results, key=lambda root_result: root_result.seconds, reverse=True
+        )[:slowest_root_count]
+        for root_result in slowest_roots:
+            logger.log_message(
+                f"  {root_result.seconds:.2f}s {root_result.source} {root_result.root_dir}"
+            )
+        for root_result in self.root_results:
+            if root_result.error is not None:
+                logger.log_message(
+                    f"  Failed to scan {root_result.root_dir}: {root_result.error}"
+                )
+        visited_entry_count = sum(
+            root_result.visited_entry_count for root_result in self.root_results
+        )
+        if visited_entry_count:
+            logger.log_message(
+                f"  Custom directory discovery listed {visited_entry_count} entries"
+            )
+        for root_result in self.root_results:
+            if root_result.budget_exhausted:
+                logger.log_message(
+                    f"  Stopped discovery in {root_result.root_dir}, its entry budget "
+                    "ran out"
+                )
+        for timed_out_path in self.timed_out_paths:
+            logger.log_message(f"  Skipped {timed_out_path}, its mount did not respond")
+
+
+@dataclass
+class ScanGameEvent:
+    kind: str
+    game_dir: pathlib.Path
+
+
+@dataclass
+class ScanProgressEvent:
+    completed_task_count: int
+    task_count: int
+
+
+ScanEvent = Union[ScanGameEvent, ScanProgressEvent]
+
+
+@dataclass
+class ScanContext:
+    """
+    Per scan state shared by every step: the directory listing memo, the worker
+    count, the persistent result cache, the deadlines for slow mounts and the limits
+    of custom directory discovery.
+    """
+
+    probe: directory_probe.DirectoryProbe = field(
+        default_factory=directory_probe.DirectoryProbe
+    )
+    worker_count: int = field(
+        default_factory=lambda: settings.get_scan_worker_count_from_settings()
+    )
+    cache: Optional[scan_cache.ScanCache] = None
+    runner: mounts.MountAwareRunner = field(
+        default_factory=lambda: mounts.MountAwareRunner(
+            settings.get_slow_mount_scan_timeout_from_settings()
+        )
+    )
+    discovery_options: dict = field(
+        default_factory=lambda: settings.get_custom_scan_discovery_options()
+    )
+    # (st_dev, st_ino) or canonical path identities of the registered games
+    registered_identities: set = field(default_factory=set)
+    cancel_event: threading.Event = field(default_factory=threading.Event)
+
+
+last_scan_report: Optional[ScanReport] = None
+
+scan_cache_store = scan_cache.ScanCache(settings.SCAN_CACHE_FILE)
+
+
+def map_in_pool(
+    func: Callable[[T], R], items: Iterable[T], worker_count: int
+) -> list[R]:
+    """
+    Runs func over items on a bounded thread pool, results keep the order of items.
+    """
+    items = list(items)
+    if worker_count <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(
+        max_workers=min(worker_count, len(items)), thread_name_prefix="game_scan"
+    ) as executor:
+        return list(executor.map(func, items))
+
+
+def get_scan_root_sources(context: ScanContext) -> dict[str, Callable[[], list]]:
+    return {
+        "steam": lambda: steam.get_all_steam_game_directories(context.runner),
+        "steam_shortcuts": lambda: steam.get_all_steam_shortcut_game_directories(
+            context.runner
+        ),
+        "epic": lambda: epic.get_all_epic_games_game_directories(context.runner),
+        "custom": lambda: list(settings.get_custom_game_directories()),
+    }
+
+
+def collect_scan_roots(context: ScanContext) -> tuple[list[tuple[str, str]], dict]:
+    """
+    Lists the roots of every source in parallel, returns (source, root_dir) pairs in
+    source order and how long each source took.
+    """
+    sources = get_scan_root_sources(context)
+
+    def list_source_roots(source: str) -> tuple[list[str], float]:
+        start_time = time.perf_counter()
+        try:
+            roots = [str(root_dir) for root_dir in sources[source]()]
+        except Exception as e:
+            logger.log_message(f"Failed to list {source} game directories: {e}")
+            roots = []
+        return roots, time.perf_counter() - start_time
+
+    scan_roots = []
+    source_seconds = {}
+    for source, (roots, seconds) in zip(
+        sources, map_in_pool(list_source_roots, sources, context.worker_count)
+    ):
+        scan_roots.extend((source, root_dir) for root_dir in roots)
+        source_seconds[source] = seconds
+    return scan_roots, source_seconds
+
+
+def get_scan_path_identity(path: str, context: ScanContext) -> tuple:
+    """
+    (st_dev, st_ino) of the directory path points at, so symlinked and differently
+    spelled paths to one directory compare equal. Falls back to the canonical path when
+    the directory can not be stat'ed in time or the filesystem has no inode numbers.
+    """
+
+    def stat_identity() -> Optional[tuple]:
+        try:
+            stat_result = os.stat(path)
+        except OSError:
+            return None
+        if stat_result.st_ino == 0:
+            return None
+        return ("inode", stat_result.st_dev, stat_result.st_ino)
+
+    identity = context.runner.call(path, stat_identity, None)
+    if identity is None:
+        return ("path", game_registry.get_canonical_game_dir_key(path))
+    return identity
+
+
+def get_unique_scan_paths(
+    paths: Iterable[T],
+    context: ScanContext,
+    seen_identities: set,
+    get_path: Callable[[T], str] = str,
+) -> list[T]:
+    """
+    Ordered set of paths by directory identity, the first spelling of a directory wins.
+    """
+    unique_paths = []
+    for path in paths:
+        identity = get_scan_path_identity(get_path(path), context)
+        if identity in seen_identities:
+            continue
+        seen_identities.add(identity)
+        unique_paths.append(path)
+    return unique_paths
+
+
+def scan_root(source: str, root_dir: str, context: ScanContext) -> ScanRootResult:
+    root_result = ScanRootResult(source=source, root_dir=root_dir)
+    start_time = time.perf_counter()
+
+    def get_root_game_dirs() -> list[str]:
+        # launcher roots are install dirs of one game, custom roots are folders of games
+        if source != "custom":
+            if unreal_engine.is_unreal_game_dir(root_dir, probe=context.probe):
+                return [root_dir]
+            return []
+        discovery = unreal_engine.discover_unreal_game_directories(
+            root_dir, probe=context.probe, **context.discovery_options
+        )
+        root_result.visited_entry_count = discovery.visited_entry_count
+        root_result.budget_exhausted = discovery.budget_exhausted
+        return discovery.game_dirs
+
+    def get_cached_root_game_dirs() -> list[str]:
+        if context.cache is None:
+            return get_root_game_dirs()
+        cache_kind = "custom_roots" if source == "custom" else "roots"
+        return context.cache.get_or_compute(
+            cache_kind, root_dir, context.probe, get_root_game_dirs
+        )
+
+    try:
+        game_dirs = context.runner.call(root_dir, get_cached_root_game_dirs, None)
+        if game_dirs is None:
+            root_result.timed_out = True
+            root_result.error = (
+                f"timed out after {context.runner.timeout_seconds:.1f}s on a "
+                f"{context.runner.get_mount_kind(root_dir)} mount"
+            )
+        else:
+            root_result.game_dirs = game_dirs
+    except Exception as e:
+        root_result.error = str(e)
+    root_result.seconds = time.perf_counter() - start_time
+    return root_result
+
+
+def get_game_classification(
+    game_path: pathlib.Path, context: ScanContext
+) -> Optional[dict[str, bool]]:
+    """
+    Returns whether game_path holds an Unreal game and whether UE4SS is installed in it,
+    or None if its mount did not answer in time.
+    """
+
+    def classify_game() -> dict[str, bool]:
+        return {
+            "is_unreal_game": unreal_engine.does_directory_contain_unreal_game(
+                game_path, context.probe
+            ),
+            "is_ue4ss_installed": ue4ss.is_ue4ss_installed(game_path, context.probe),
+        }
+
+    def get_cached_classification() -> dict[str, bool]:
+        if context.cache is None:
+            return classify_game()
+        return context.cache.get_or_compute(
+            "games", str(game_path), context.probe, classify_game
+        )
+
+    return context.runner.call(game_path, get_cached_classification, None)
+
+
+def start_scan_report(
+    context: ScanContext,
+) -> tuple[ScanReport, list[tuple[str, str]]]:
+    """
+    Lists every root and reduces them to an ordered set by directory identity before
+    any probing. Registered games go into the set first so a root that is already
+    registered is not scanned, the report starts with them as a "settings" pseudo root.
+    """
+    registered_game_dirs = [
+        str(game_dir) for game_dir in settings.get_game_dirs_in_settings()
+    ]
+    context.registered_identities = set()
+    get_unique_scan_paths(registered_game_dirs, context, context.registered_identities)
+
+    scan_roots, source_seconds = collect_scan_roots(context)
+    unique_scan_roots = get_unique_scan_paths(
+        scan_roots,
+        context,
+        set(context.registered_identities),
+        get_path=lambda scan_root_pair: scan_root_pair[1],
+    )
+    report = ScanReport(
+        worker_count=context.worker_count,
+        source_seconds=source_seconds,
+        listed_root_count=len(scan_roots),
+        unique_root_count=len(unique_scan_roots),
+    )
+    report.root_results = [
+        ScanRootResult(
+            source="settings",
+            root_dir=settings.config_dir,
+            game_dirs=registered_game_dirs,
+        )
+    ]
+    return report, unique_scan_roots
+
+
+def is_game_to_add(game_path: pathlib.Path, context: ScanContext) -> bool:
+    classification = get_game_classification(game_path, context)
+    if classification is None:
+        return False
+    return classification["is_unreal_game"] or classification["is_ue4ss_installed"]
+
+
+def is_game_to_remove(game_path: pathlib.Path, context: ScanContext) -> bool:
+    """
+    Whether a registered game's dir is gone or no longer holds an Unreal game, games
+    on mounts that time out are kept.
+    """
+
+    def is_missing_or_not_a_game() -> bool:
+        if not context.probe.is_dir(game_path):
+            return True
+        classification = get_game_classification(game_path, context)
+        if classification is None:
+            return False
+        return not (
+            classification["is_unreal_game"] or classification["is_ue4ss_installed"]
+        )
+
+    return context.runner.call(game_path, is_missing_or_not_a_game, False)
+
+
+def iter_scan_events(
+    context: Optional[ScanContext] = None, include_removals: bool = True
+) -> Iterator[ScanEvent]:
+    """
+    Runs a whole scan on one pool and yields each game found or removed as soon as
+    its check finishes, so a fast library is reported without waiting on the slowest
+    one. Root scans, game classification and removal checks share the pool, found
+    dirs are deduplicated as their root finishes. Setting context.cancel_event stops
+    the scan at the next finished task, queued tasks are dropped.
+    """
+    global last_scan_report
+    if context is None:
+        context = ScanContext()
+
+    start_time = time.perf_counter()
+    registry = settings.get_game_registry()
+    registered_game_paths = [pathlib.Path(game.get("install_dir")) for game in registry]
+    executor = ThreadPoolExecutor(
+        max_workers=context.worker_count, thread_name_prefix="game_scan"
+    )
+    pending_tasks: dict[Future, tuple[str, Optional[pathlib.Path]]] = {}
+
+    def submit_task(
+        task_kind: str,
+        func: Callable[[], object],
+        game_path: Optional[pathlib.Path] = None,
+    ):
+        pending_tasks[executor.submit(func)] = (task_kind, game_path)
+
+    try:
+        if include_removals:
+            for game_path in registered_game_paths:
+                submit_task(
+                    "remove",
+                    functools.partial(is_game_to_remove, game_path, context),
+                    game_path,
+                )
+
+        report, unique_scan_roots = start_scan_report(context)
+        for source, root_dir in unique_scan_roots:
+            submit_task("root", functools.partial(scan_root, source, root_dir, context))
+
+        seen_candidate_identities = set(context.registered_identities)
+        task_count = len(pending_tasks)
+        completed_task_count = 0
+        while pending_tasks and not context.cancel_event.is_set():
+            done_tasks, _ = wait(
+                pending_tasks,
+                timeout=SCAN_CANCEL_POLL_SECONDS,
+                return_when=FIRST_COMPLETED,
+            )
+            for future in done_tasks:
+                task_kind, game_path = pending_tasks.pop(future)
+                completed_task_count += 1
+                result = future.result()
+                if task_kind == "root":
+                    report.root_results.append(result)
+                    report.listed_candidate_count += len(result.game_dirs)
+                    for game_dir in get_unique_scan_paths(
+                        result.game_dirs, context, seen_candidate_identities
+                    ):
+                        candidate_path = pathlib.Path(game_dir)
+                        if candidate_path in registry:
+                            continue
+                        report.unique_candidate_count += 1
+                        task_count += 1
+                        submit_task(
+                            "add",
+                            functools.partial(is_game_to_add, candidate_path, context),
+                            candidate_path,
+                        )
+                elif game_path is not None and result:
+                    yield ScanGameEvent(
+                        SCAN_EVENT_GAME_FOUND
+                        if task_kind == "add"
+                        else SCAN_EVENT_GAME_REMOVED,
+                        game_path,
+                    )
+            yield ScanProgressEvent(completed_task_count, task_count)
+    finally:
+        cancelled = context.cancel_event.is_set() or bool(pending_tasks)
+        # do not wait on abandoned work, it may sit on a stalled mount
+        executor.shutdown(wait=not cancelled, cancel_futures=True)
+
+    # back to scan root order, roots finish in any order
+    root_order = {
+        scan_root_pair: index for index, scan_root_pair in enumerate(unique_scan_roots)
+    }
+    report.root_results[1:] = sorted(
+        report.root_results[1:],
+        key=lambda root_result: root_order[(root_result.source, root_result.root_dir)],
+    )
+    report.timed_out_paths = context.runner.timed_out_paths
+    report.seconds = time.perf_counter() - start_time
+    last_scan_report = report
+    if cancelled:
+        logger.log_message("Game scan cancelled")
+    report.log()
@@ -1,5 +1,4 @@
 import os
-import asyncio
 
 from ue4ss_installer_gui import ue4ss, settings, translator, logger, file_io
 from ue4ss_installer_gui.checks import online_check
@@ -12,10 +11,12 @@ def init():
     print(f"Is online: {online_check.is_online}")
     logger.set_log_base_dir(os.path.normpath(f"{file_io.SCRIPT_DIR}/logs"))
     logger.configure_logging()
+    # fetched in parallel with the rest of startup, offline the release cache still
+    # lists the assets downloaded on earlier runs
+    ue4ss.start_caching_repo_releases_info(
+        "UE4SS-RE", "RE-UE4SS", offline=not online_check.is_online
+    )
+    ue4ss.add_repo_releases_info_ready_callback(
+        ue4ss.resolve_latest_ue4ss_versions_in_settings
+    )
     translator.init_translator()
-    if online_check.is_online:
-        asyncio.run(auto_fetch_tags_on_start())
-
-
-async def auto_fetch_tags_on_start():
-    ue4ss.cache_repo_releases_info("UE4SS-RE", "RE-UE4SS")
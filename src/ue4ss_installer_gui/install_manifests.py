@@ -0,0 +1,158 @@
+import os
+import gzip
+import json
+import zlib
+import hashlib
+import pathlib
+from typing import Iterable, Union
+
+from ue4ss_installer_gui import game_registry
+from ue4ss_installer_gui.data_structures import InstallManifestEntry
+
+
+INSTALL_MANIFEST_FORMAT_VERSION = 1
+
+
+def get_shared_prefix_length(first: str, second: str) -> int:
+    max_length = min(len(first), len(second))
+    index = 0
+    while index < max_length and first[index] == second[index]:
+        index += 1
+    return index
+
+
+def encode_install_manifest_entries(
+    entries: Iterable[InstallManifestEntry],
+) -> list[list]:
+    """
+    Front codes the sorted paths, each row stores how many characters it shares with
+    the previous path, the rest of the path, the size and the CRC.
+    """
+    rows = []
+    previous_path = ""
+    for entry in sorted(entries, key=lambda entry: entry.path):
+        shared_length = get_shared_prefix_length(previous_path, entry.path)
+        rows.append([shared_length, entry.path[shared_length:], entry.size, entry.crc])
+        previous_path = entry.path
+    return rows
+
+
+def decode_install_manifest_entries(rows: Iterable[list]) -> list[InstallManifestEntry]:
+    entries = []
+    previous_path = ""
+    for shared_length, suffix, size, crc in rows:
+        path = previous_path[:shared_length] + suffix
+        entries.append(InstallManifestEntry(path=path, size=size, crc=crc))
+        previous_path = path
+    return entries
+
+
+class InstallManifestStore:
+    """
+    Keeps the list of files UE4SS installed for each game in its own compressed
+    sidecar file, so the settings file stays small and the lists are only read by
+    install, uninstall and verify.
+    """
+
+    def __init__(self, manifests_dir: str):
+        self.manifests_dir = manifests_dir
+
+    def get_manifest_path(self, game_directory: Union[str, pathlib.Path]) -> str:
+        game_dir_key = game_registry.get_canonical_game_dir_key(game_directory)
+        file_name = hashlib.sha1(game_dir_key.encode("utf-8")).hexdigest()[:16]
+        return os.path.join(self.manifests_dir, f"{file_name}.json.gz")
+
+    def has_manifest(self, game_directory: Union[str, pathlib.Path]) -> bool:
+        return os.path.isfile(self.get_manifest_path(game_directory))
+
+    def save(
+        self,
+        game_directory: Union[str, pathlib.Path],
+        entries: Iterable[InstallManifestEntry],
+    ):
+        entries = list(entries)
+        if not entries:
+            self.delete(game_directory)
+            return
+
+        manifest = {
+            "version": INSTALL_MANIFEST_FORMAT_VERSION,
+            "install_dir": os.path.normpath(str(game_directory)),
+            "entries": encode_install_manifest_entries(entries),
+        }
+        os.makedirs(self.manifests_dir, exist_ok=True)
+        manifest_path = self.get_manifest_path(game_directory)
+        temp_path = f"{manifest_path}.tmp"
+        with gzip.open(temp_path, "wt", encoding="utf-8") as file:
+            json.dump(manifest, file, separators=(",", ":"))
+        os.replace(temp_path, manifest_path)
+
+    def load(
+        self, game_directory: Union[str, pathlib.Path]
+    ) -> list[InstallManifestEntry]:
+        manifest_path = self.get_manifest_path(game_directory)
+        if not os.path.isfile(manifest_path):
+            return []
+
+        with gzip.open(manifest_path, "rt", encoding="utf-8") as file:
+            manifest = json.load(file)
+
+        if game_registry.get_canonical_game_dir_key(
+            manifest.get("install_dir", "")
+        ) != game_registry.get_canonical_game_dir_key(game_directory):
+            return []
+
+        return decode_install_manifest_entries(manifest.get("entries", []))
+
+    def delete(self, game_directory: Union[str, pathlib.Path]):
+        manifest_path = self.get_manifest_path(game_directory)
+        if os.path.isfile(manifest_path):
+            os.remove(manifest_path)
+
+    def verify(
+        self,
+        game_directory: Union[str, pathlib.Path],
+        exe_dir: Union[str, pathlib.Path],
+        check_crc: bool = False,
+    ) -> list[InstallManifestEntry]:
+        """
+        Returns the manifest entries that are missing from exe_dir or whose size (and
+        optionally CRC) no longer matches what was installed.
+        """
+        mismatched_entries = []
+        for entry in self.load(game_directory):
+            file_path = os.path.normpath(f"{exe_dir}/{entry.path}")
+            try:
+                file_size = os.stat(file_path).st_size
+            except OSError:
+                mismatched_entries.append(entry)
+                continue
+
+            if entry.size is not None and file_size != entry.size:
+                mismatched_entries.append(entry)
+            elif check_crc and entry.crc is not None:
+                if get_file_crc(file_path) != entry.crc:
+                    mismatched_entries.append(entry)
+
+        return mismatched_entries
+
+
+def get_file_crc(file_path: str) -> int:
+    crc = 0
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+
+def get_install_manifest_entries_from_paths(
+    paths: Iterable[str],
+) -> list[InstallManifestEntry]:
+    """
+    Entries for file lists that carry no size or CRC, like the old inline installed_files.
+    """
+    return [
+        InstallManifestEntry(path=str(path))
+        for path in paths
+        if not str(path).endswith(("/", "\\"))
+    ]
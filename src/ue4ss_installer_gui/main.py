@@ -4,7 +4,14 @@ import time
 import dearpygui.dearpygui as dpg
 
 from ue4ss_installer_gui.screens import main_screen
-from ue4ss_installer_gui import file_io, constants, settings, initialization, font
+from ue4ss_installer_gui import (
+    file_io,
+    constants,
+    settings,
+    initialization,
+    font,
+    ui_tasks,
+)
 import ue4ss_installer_gui.theme_management
 
 
@@ -105,5 +112,11 @@ def main():
     remove_maximize_button(constants.APP_TITLE)
 
     dpg.show_viewport()
-    dpg.start_dearpygui()
+    # manual render loop so updates posted by background scans run between frames
+    while dpg.is_dearpygui_running():
+        ui_tasks.run_pending_ui_tasks()
+        dpg.render_dearpygui_frame()
     dpg.destroy_context()
+
+    settings.flush_settings()
+    settings.log_settings_write_stats()
@@ -0,0 +1,177 @@
+import os
+import re
+import pathlib
+import threading
+from dataclasses import dataclass
+from typing import Callable, Optional, TypeVar, Union
+
+
+T = TypeVar("T")
+
+PROC_MOUNTS_FILE = "/proc/self/mounts"
+
+MOUNT_KIND_LOCAL = "local"
+MOUNT_KIND_NETWORK = "network"
+MOUNT_KIND_REMOVABLE = "removable"
+
+NETWORK_FS_TYPES = frozenset(
+    (
+        "nfs",
+        "nfs4",
+        "cifs",
+        "smbfs",
+        "smb3",
+        "9p",
+        "afs",
+        "ceph",
+        "glusterfs",
+        "davfs",
+        "fuse.sshfs",
+        "fuse.rclone",
+        "fuse.s3fs",
+        "fuse.gvfsd-fuse",
+        "fuse.davfs2",
+    )
+)
+
+REMOVABLE_MOUNT_PREFIXES = ("/media/", "/run/media/")
+
+# fstab style octal escapes for spaces, tabs, newlines and backslashes in mount points
+MOUNT_ESCAPE_PATTERN = re.compile(r"\\([0-7]{3})")
+
+
+@dataclass
+class MountInfo:
+    device: str
+    mount_point: str
+    fs_type: str
+    kind: str
+
+
+def unescape_mount_field(field: str) -> str:
+    return MOUNT_ESCAPE_PATTERN.sub(lambda match: chr(int(match.group(1), 8)), field)
+
+
+def is_removable_block_device(device: str) -> bool:
+    """
+    Checks /sys/block/<disk>/removable for /dev/sdXN style devices.
+    """
+    if not device.startswith("/dev/"):
+        return False
+    disk_name = re.sub(r"(?<=[a-z])\d+$|(?<=\d)p\d+$", "", os.path.basename(device))
+    try:
+        with open(f"/sys/block/{disk_name}/removable", "r", encoding="utf-8") as file:
+            return file.read().strip() == "1"
+    except OSError:
+        return False
+
+
+def classify_mount(device: str, mount_point: str, fs_type: str) -> str:
+    if fs_type in NETWORK_FS_TYPES or device.startswith("//"):
+        return MOUNT_KIND_NETWORK
+    if f"{mount_point}/".startswith(REMOVABLE_MOUNT_PREFIXES):
+        return MOUNT_KIND_REMOVABLE
+    if is_removable_block_device(device):
+        return MOUNT_KIND_REMOVABLE
+    return MOUNT_KIND_LOCAL
+
+
+def parse_proc_mounts(text: str) -> list[MountInfo]:
+    mounts = []
+    for line in text.splitlines():
+        fields = line.split()
+        if len(fields) < 3:
+            continue
+        device, mount_point, fs_type = (
+            unescape_mount_field(fields[0]),
+            unescape_mount_field(fields[1]),
+            fields[2],
+        )
+        mounts.append(
+            MountInfo(
+                device=device,
+                mount_point=mount_point,
+                fs_type=fs_type,
+                kind=classify_mount(device, mount_point, fs_type),
+            )
+        )
+    return mounts
+
+
+def get_mounts(proc_mounts_file: str = PROC_MOUNTS_FILE) -> list[MountInfo]:
+    """
+    The mount table, empty where there is no /proc (Windows) so every path counts as local.
+    """
+    try:
+        with open(proc_mounts_file, "r", encoding="utf-8", errors="replace") as file:
+            return parse_proc_mounts(file.read())
+    except OSError:
+        return []
+
+
+def get_mount_for_path(
+    path: Union[str, pathlib.Path], mounts: list[MountInfo]
+) -> Optional[MountInfo]:
+    """
+    Longest mount point prefix of path. Only the path string is looked at, resolving
+    it could itself hang on a stalled mount.
+    """
+    path = os.path.abspath(str(path))
+    best_mount = None
+    for mount in mounts:
+        mount_point = mount.mount_point.rstrip("/") or "/"
+        if path == mount_point or path.startswith(
+            mount_point if mount_point == "/" else f"{mount_point}/"
+        ):
+            if best_mount is None or len(mount_point) > len(best_mount.mount_point):
+                best_mount = mount
+    return best_mount
+
+
+class MountAwareRunner:
+    """
+    Runs filesystem work for paths on network or removable mounts in a daemon thread
+    with a deadline. A stalled mount can block a thread forever, so work that misses
+    its deadline is abandoned and its path recorded as timed out instead of hanging
+    the scan. Paths on local mounts run directly.
+    """
+
+    def __init__(
+        self, timeout_seconds: float, mounts: Optional[list[MountInfo]] = None
+    ):
+        self.timeout_seconds = timeout_seconds
+        self.mounts = get_mounts() if mounts is None else mounts
+        self.timed_out_paths: list[str] = []
+        self._lock = threading.Lock()
+
+    def get_mount_kind(self, path: Union[str, pathlib.Path]) -> str:
+        mount = get_mount_for_path(path, self.mounts)
+        return MOUNT_KIND_LOCAL if mount is None else mount.kind
+
+    def is_slow_path(self, path: Union[str, pathlib.Path]) -> bool:
+        return self.get_mount_kind(path) != MOUNT_KIND_LOCAL
+
+    def call(
+        self, path: Union[str, pathlib.Path], func: Callable[[], T], default: T
+    ) -> T:
+        if not self.is_slow_path(path):
+            return func()
+
+        result = {}
+
+        def run():
+            try:
+                result["value"] = func()
+            except Exception as e:
+                result["error"] = e
+
+        worker = threading.Thread(target=run, daemon=True, name="slow_mount_probe")
+        worker.start()
+        worker.join(self.timeout_seconds)
+        if worker.is_alive():
+            with self._lock:
+                self.timed_out_paths.append(str(path))
+            return default
+        if "error" in result:
+            raise result["error"]
+        return result["value"]
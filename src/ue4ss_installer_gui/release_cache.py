@@ -0,0 +1,442 @@
+import os
+import re
+import json
+import hashlib
+import time
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+import requests
+import requests.adapters
+
+from ue4ss_installer_gui import logger, file_io
+
+
+T = TypeVar("T")
+
+RELEASE_CACHE_FORMAT_VERSION = 1
+
+GITHUB_API_URL = "https://api.github.com"
+
+RELEASES_PAGE_SIZE = 100
+
+REQUEST_TIMEOUT_SECONDS = 15
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 256
+
+# pages fetched at once after the first page's Link header gives the page count
+RELEASE_PAGE_WORKER_COUNT = 4
+
+KEPT_RELEASE_FIELDS = ("id", "tag_name", "prerelease", "created_at")
+
+KEPT_ASSET_FIELDS = ("name", "browser_download_url", "created_at", "size", "digest")
+
+LINK_PATTERN = re.compile(r'<([^>]*)>\s*;\s*rel="([^"]*)"')
+
+
+http_session: Optional[requests.Session] = None
+http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Shared session so every GitHub request reuses pooled keep-alive connections
+    instead of a new TCP and TLS handshake per page.
+    """
+    global http_session
+    with http_session_lock:
+        if http_session is None:
+            http_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=2, pool_maxsize=RELEASE_PAGE_WORKER_COUNT
+            )
+            http_session.mount("https://", adapter)
+            http_session.mount("http://", adapter)
+        return http_session
+
+
+def parse_link_header(link_header: str) -> dict[str, str]:
+    """
+    rel -> url of an RFC 8288 Link header such as GitHub's pagination links.
+    """
+    links = {}
+    for link in link_header.split(","):
+        match = LINK_PATTERN.match(link.strip())
+        if match is not None:
+            for rel in match.group(2).split():
+                links[rel] = match.group(1)
+    return links
+
+
+def get_last_page_number(link_header: str) -> Optional[int]:
+    last_url = parse_link_header(link_header).get("last")
+    if last_url is None:
+        return None
+    page_values = urllib.parse.parse_qs(urllib.parse.urlparse(last_url).query).get(
+        "page"
+    )
+    if not page_values or not page_values[0].isdigit():
+        return None
+    return int(page_values[0])
+
+
+def trim_asset(asset: dict) -> dict:
+    return {key: asset[key] for key in KEPT_ASSET_FIELDS if key in asset}
+
+
+def trim_release(release: dict) -> dict:
+    """
+    Drops everything the installer does not use, markdown bodies, author and uploader
+    objects and reactions make up most of a release's JSON.
+    """
+    trimmed_release = {
+        key: release[key] for key in KEPT_RELEASE_FIELDS if key in release
+    }
+    trimmed_release["assets"] = [
+        trim_asset(asset) for asset in release.get("assets", [])
+    ]
+    return trimmed_release
+
+
+def get_release_key(release: dict):
+    return release.get("id", release.get("tag_name"))
+
+
+def map_pages_in_pool(func: Callable[[int], T], page_numbers: range) -> list[T]:
+    if len(page_numbers) <= 1:
+        return [func(page_number) for page_number in page_numbers]
+    with ThreadPoolExecutor(
+        max_workers=min(RELEASE_PAGE_WORKER_COUNT, len(page_numbers)),
+        thread_name_prefix="release_pages",
+    ) as executor:
+        return list(executor.map(func, page_numbers))
+
+
+class ReleaseCache:
+    """
+    GitHub releases pages of each repo with their ETags and the time they were last
+    fetched, plus the release assets downloaded so far. Pages younger than the ttl
+    are used as they are, older ones are revalidated with If-None-Match so unchanged
+    pages cost a 304 instead of a full response and, for authenticated requests, no
+    rate limit. Both survive restarts so offline starts still have a catalog and
+    installs of assets downloaded before.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.releases_file = os.path.join(cache_dir, "releases.json")
+        self.assets_dir = os.path.join(cache_dir, "assets")
+        self.lock = threading.Lock()
+        self._repos: Optional[dict] = None
+
+    def _get_repos(self) -> dict:
+        if self._repos is not None:
+            return self._repos
+        repos: dict = {}
+        if os.path.isfile(self.releases_file):
+            try:
+                with open(self.releases_file, "r", encoding="utf-8") as file:
+                    cache = json.load(file)
+                if cache.get("version") == RELEASE_CACHE_FORMAT_VERSION and isinstance(
+                    cache.get("repos"), dict
+                ):
+                    repos = cache["repos"]
+            except (OSError, ValueError, AttributeError) as e:
+                logger.log_message(f"Ignoring unreadable release cache: {e}")
+        # caches written before trimming still hold full releases, a malformed repo
+        # entry is dropped on its own instead of failing the whole load
+        for repo_key, repo_cache in list(repos.items()):
+            try:
+                for page in repo_cache["pages"]:
+                    page["releases"] = [
+                        trim_release(release) for release in page["releases"]
+                    ]
+            except (KeyError, TypeError, AttributeError) as e:
+                logger.log_message(f"Ignoring malformed {repo_key} release cache: {e}")
+                del repos[repo_key]
+        self._repos = repos
+        return repos
+
+    def _save(self):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        file_io.write_file_atomically(
+            json.dumps(
+                {"version": RELEASE_CACHE_FORMAT_VERSION, "repos": self._get_repos()},
+                separators=(",", ":"),
+            ),
+            self.releases_file,
+        )
+
+    def get_cached_releases(
+        self, owner: str, repo: str, ttl_seconds: Optional[float] = None
+    ) -> Optional[list[dict]]:
+        """
+        Cached releases of the repo, None if there are none or, with a ttl, if they
+        were fetched longer than ttl_seconds ago.
+        """
+        with self.lock:
+            repo_cache = self._get_repos().get(f"{owner}/{repo}")
+            if repo_cache is None:
+                return None
+            if (
+                ttl_seconds is not None
+                and time.time() - repo_cache.get("fetched_at", 0) > ttl_seconds
+            ):
+                return None
+            return [
+                release for page in repo_cache["pages"] for release in page["releases"]
+            ]
+
+    def fetch_page(
+        self,
+        session: requests.Session,
+        url: str,
+        page_number: int,
+        cached_page: Optional[dict],
+    ) -> tuple[dict, bool, Optional[int]]:
+        """
+        One releases page revalidated against its cached ETag. Returns the page,
+        whether GitHub answered 304 and the last page number from the Link header.
+        """
+        headers = {"Accept": "application/vnd.github.v3+json"}
+        if cached_page is not None and cached_page.get("etag"):
+            headers["If-None-Match"] = cached_page["etag"]
+
+        response = session.get(
+            url,
+            headers=headers,
+            params={"page": page_number, "per_page": RELEASES_PAGE_SIZE},
+            timeout=REQUEST_TIMEOUT_SECONDS,
+        )
+        last_page_number = get_last_page_number(response.headers.get("Link", ""))
+        if response.status_code == 304 and cached_page is not None:
+            return cached_page, True, last_page_number
+        if response.status_code != 200:
+            raise Exception(
+                f"GitHub API error: {response.status_code} - {response.text}"
+            )
+        # trimmed as each page arrives so the full JSON of only one page is alive
+        page = {
+            "etag": response.headers.get("ETag", ""),
+            "releases": [trim_release(release) for release in response.json()],
+        }
+        return page, False, last_page_number
+
+    def fetch_releases(
+        self,
+        owner: str,
+        repo: str,
+        session: Optional[requests.Session] = None,
+        api_url: str = GITHUB_API_URL,
+        incremental: bool = False,
+    ) -> list[dict]:
+        """
+        Fetches the repo's releases, sending each page's cached ETag. The first page's
+        Link header gives the last page, the rest are then fetched concurrently.
+        Incremental fetches stop after the first page holding an already cached
+        release, which skips revalidating older pages but misses edits to them.
+        Raises on any error so the caller can fall back to the cached releases.
+        """
+        if session is None:
+            session = get_http_session()
+        url = f"{api_url.rstrip('/')}/repos/{owner}/{repo}/releases"
+        repo_key = f"{owner}/{repo}"
+
+        with self.lock:
+            cached_pages = list(self._get_repos().get(repo_key, {}).get("pages", []))
+
+        def get_cached_page(page_number: int) -> Optional[dict]:
+            if page_number <= len(cached_pages):
+                return cached_pages[page_number - 1]
+            return None
+
+        if incremental and cached_pages:
+            pages, not_modified_count = self._fetch_new_pages(
+                session, url, cached_pages
+            )
+        else:
+            pages, not_modified_count = self._fetch_all_pages(
+                session, url, get_cached_page
+            )
+
+        logger.log_message(
+            f"Fetched {len(pages)} release pages of {repo_key}, "
+            f"{not_modified_count} not modified"
+        )
+        with self.lock:
+            self._get_repos()[repo_key] = {"fetched_at": time.time(), "pages": pages}
+            self._save()
+        return [release for page in pages for release in page["releases"]]
+
+    def _fetch_all_pages(
+        self,
+        session: requests.Session,
+        url: str,
+        get_cached_page: Callable[[int], Optional[dict]],
+    ) -> tuple[list[dict], int]:
+        first_page, not_modified, last_page_number = self.fetch_page(
+            session, url, 1, get_cached_page(1)
+        )
+        has_link_header = last_page_number is not None
+        if last_page_number is None:
+            if not_modified:
+                # 304s do not always carry a Link header, revalidate the cached pages
+                page_number = 1
+                while get_cached_page(page_number + 1) is not None:
+                    page_number += 1
+                last_page_number = page_number
+            else:
+                last_page_number = 1
+
+        page_numbers = range(2, last_page_number + 1)
+        # (page, not modified, last page number of that page's Link header)
+        results: list[tuple[dict, bool, Optional[int]]] = [
+            (first_page, not_modified, last_page_number)
+        ]
+        results.extend(
+            map_pages_in_pool(
+                lambda page_number: self.fetch_page(
+                    session, url, page_number, get_cached_page(page_number)
+                ),
+                page_numbers,
+            )
+        )
+
+        # without a Link header the page count is a guess, keep going while the
+        # last page is full
+        while not has_link_header and len(results[-1][0]["releases"]) >= (
+            RELEASES_PAGE_SIZE
+        ):
+            page_number = len(results) + 1
+            results.append(
+                self.fetch_page(session, url, page_number, get_cached_page(page_number))
+            )
+
+        pages = [page for page, _, _ in results if page["releases"]]
+        not_modified_count = sum(1 for _, not_modified, _ in results if not_modified)
+        return pages, not_modified_count
+
+    def _fetch_new_pages(
+        self, session: requests.Session, url: str, cached_pages: list[dict]
+    ) -> tuple[list[dict], int]:
+        cached_releases = [
+            release for page in cached_pages for release in page["releases"]
+        ]
+        cached_release_keys = {get_release_key(release) for release in cached_releases}
+
+        fresh_pages = []
+        page_number = 1
+        while True:
+            cached_page = cached_pages[0] if page_number == 1 else None
+            page, not_modified, _ = self.fetch_page(
+                session, url, page_number, cached_page
+            )
+            if not_modified:
+                # nothing was published since the last fetch
+                return cached_pages, 1
+            fresh_pages.append(page)
+            releases = page["releases"]
+            if len(releases) < RELEASES_PAGE_SIZE or any(
+                get_release_key(release) in cached_release_keys for release in releases
+            ):
+                break
+            page_number += 1
+
+        fresh_releases = [
+            release for page in fresh_pages for release in page["releases"]
+        ]
+        fresh_release_keys = {get_release_key(release) for release in fresh_releases}
+        releases = fresh_releases + [
+            release
+            for release in cached_releases
+            if get_release_key(release) not in fresh_release_keys
+        ]
+        # only the fetched pages still line up with GitHub's pages, the ETags of
+        # the shifted cached pages no longer apply
+        pages = fresh_pages + [
+            {"etag": "", "releases": releases[index : index + RELEASES_PAGE_SIZE]}
+            for index in range(
+                len(fresh_pages) * RELEASES_PAGE_SIZE, len(releases), RELEASES_PAGE_SIZE
+            )
+        ]
+        return pages, 0
+
+    def get_asset_path(self, tag: str, file_name: str) -> str:
+        return os.path.join(self.assets_dir, tag, file_name)
+
+    def is_asset_cached(self, tag: str, file_name: str) -> bool:
+        return os.path.isfile(self.get_asset_path(tag, file_name))
+
+    def get_cached_asset_names(self) -> set[tuple[str, str]]:
+        """
+        (tag, file name) of every downloaded asset.
+        """
+        asset_names = set()
+        if not os.path.isdir(self.assets_dir):
+            return asset_names
+        for tag in os.listdir(self.assets_dir):
+            tag_dir = os.path.join(self.assets_dir, tag)
+            if not os.path.isdir(tag_dir):
+                continue
+            for file_name in os.listdir(tag_dir):
+                if os.path.isfile(os.path.join(tag_dir, file_name)):
+                    asset_names.add((tag, file_name))
+        return asset_names
+
+    def download_asset(
+        self,
+        url: str,
+        tag: str,
+        file_name: str,
+        session: Optional[requests.Session] = None,
+        size: int = 0,
+        digest: str = "",
+    ) -> str:
+        """
+        Path of the asset in the cache, downloading it first if it is not there yet.
+        The download goes to a .part file that is renamed once complete. A known size
+        is checked for cached and downloaded files, a known "sha256:" digest only for
+        downloads, so a cache hit costs a stat instead of hashing the whole zip.
+        """
+        asset_path = self.get_asset_path(tag, file_name)
+        if os.path.isfile(asset_path):
+            if not size or os.path.getsize(asset_path) == size:
+                return asset_path
+            logger.log_message(
+                f"Cached {file_name} of {tag} is not {size} bytes, downloading it again"
+            )
+        if session is None:
+            session = get_http_session()
+
+        os.makedirs(os.path.dirname(asset_path), exist_ok=True)
+        part_path = f"{asset_path}.part"
+        digest_algorithm, _, expected_hexdigest = digest.partition(":")
+        file_hash = (
+            hashlib.sha256()
+            if digest_algorithm == "sha256" and expected_hexdigest
+            else None
+        )
+        try:
+            with session.get(url, stream=True, timeout=REQUEST_TIMEOUT_SECONDS) as r:
+                r.raise_for_status()
+                with open(part_path, "wb") as file:
+                    for chunk in r.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        file.write(chunk)
+                        if file_hash is not None:
+                            file_hash.update(chunk)
+            if size and os.path.getsize(part_path) != size:
+                raise OSError(
+                    f"Downloaded {file_name} is {os.path.getsize(part_path)} bytes, "
+                    f"expected {size}"
+                )
+            if file_hash is not None and file_hash.hexdigest() != expected_hexdigest:
+                raise OSError(f"Downloaded {file_name} does not match its {digest}")
+            os.replace(part_path, asset_path)
+        except BaseException:
+            if os.path.isfile(part_path):
+                os.remove(part_path)
+            raise
+        logger.log_message(f"Downloaded {file_name} of {tag} to the release cache")
+        return asset_path
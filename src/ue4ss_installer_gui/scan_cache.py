@@ -0,0 +1,131 @@
+import os
+import json
+import threading
+from typing import Any, Callable, Iterable, Optional
+
+from ue4ss_installer_gui import logger, file_io, game_registry, directory_probe
+
+
+SCAN_CACHE_FORMAT_VERSION = 1
+
+
+def get_directory_stamp(directory: str) -> Optional[list[int]]:
+    """
+    Returns [mtime_ns, inode] for directory, or None if it does not exist. A directory's
+    mtime changes whenever an entry is added, removed or renamed inside it.
+    """
+    try:
+        stat_result = os.stat(directory)
+    except OSError:
+        return None
+    return [stat_result.st_mtime_ns, stat_result.st_ino]
+
+
+class ScanCache:
+    """
+    Persistent results of earlier game scans. Each result stores the stamps of every
+    directory listed while computing it and is reused until one of those directories
+    changes, so a rescan of an unchanged library only stats directories.
+    """
+
+    def __init__(self, cache_file: str):
+        self.cache_file = cache_file
+        self.lock = threading.Lock()
+        self._entries: Optional[dict[str, dict[str, dict]]] = None
+        self._used_keys: set[tuple[str, str]] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def _get_entries(self) -> dict[str, dict[str, dict]]:
+        if self._entries is not None:
+            return self._entries
+
+        entries: dict[str, dict[str, dict]] = {}
+        if os.path.isfile(self.cache_file):
+            try:
+                with open(self.cache_file, "r", encoding="utf-8") as file:
+                    cache = json.load(file)
+                if cache.get("version") == SCAN_CACHE_FORMAT_VERSION and isinstance(
+                    cache.get("entries"), dict
+                ):
+                    entries = cache["entries"]
+            except (OSError, ValueError, AttributeError) as e:
+                logger.log_message(f"Ignoring unreadable scan cache: {e}")
+        self._entries = entries
+        return entries
+
+    def get(self, kind: str, directory: str) -> Optional[Any]:
+        """
+        Returns the cached value if none of the directories it depends on changed.
+        """
+        key = game_registry.get_canonical_game_dir_key(directory)
+        with self.lock:
+            entry = self._get_entries().get(kind, {}).get(key)
+        if entry is None:
+            return None
+
+        for dependency, stamp in entry.get("dependencies", {}).items():
+            if get_directory_stamp(dependency) != stamp:
+                return None
+
+        with self.lock:
+            self._used_keys.add((kind, key))
+        return entry.get("value")
+
+    def put(self, kind: str, directory: str, value: Any, dependencies: Iterable[str]):
+        key = game_registry.get_canonical_game_dir_key(directory)
+        entry = {
+            "value": value,
+            "dependencies": {
+                dependency: get_directory_stamp(dependency)
+                for dependency in sorted(dependencies)
+            },
+        }
+        with self.lock:
+            self._get_entries().setdefault(kind, {})[key] = entry
+            self._used_keys.add((kind, key))
+
+    def get_or_compute(
+        self,
+        kind: str,
+        directory: str,
+        probe: directory_probe.DirectoryProbe,
+        compute: Callable[[], Any],
+    ) -> Any:
+        value = self.get(kind, directory)
+        if value is not None:
+            with self.lock:
+                self.hits += 1
+            return value
+
+        with probe.record_listed_dirs() as listed_dirs:
+            value = compute()
+        self.put(kind, directory, value, listed_dirs)
+        with self.lock:
+            self.misses += 1
+        return value
+
+    def save(self):
+        """
+        Writes the results used by this scan, results for directories that were not
+        scanned again are dropped so the cache does not grow without bound.
+        """
+        with self.lock:
+            entries = self._get_entries()
+            kept_entries = {}
+            for kind, key in self._used_keys:
+                kept_entries.setdefault(kind, {})[key] = entries[kind][key]
+            self._entries = kept_entries
+            self._used_keys = set()
+            content = json.dumps(
+                {"version": SCAN_CACHE_FORMAT_VERSION, "entries": kept_entries},
+                separators=(",", ":"),
+            )
+
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        file_io.write_file_atomically(content, self.cache_file)
+        logger.log_message(
+            f"Scan cache saved, {self.hits} results reused, {self.misses} recomputed"
+        )
+        self.hits = 0
+        self.misses = 0
@@ -10,12 +10,18 @@ from ue4ss_installer_gui import (
     settings,
     constants,
     unreal_engine,
+    directory_probe,
 )
 
 
-def game_dir_actually_has_unreal_game_check(game_dir_path: pathlib.Path):
-    if not unreal_engine.does_directory_contain_unreal_game(game_dir_path):
-        if settings.has_inited_settings:
+def game_dir_actually_has_unreal_game_check(
+    game_dir_path: pathlib.Path,
+    probe: directory_probe.DirectoryProbe | None = None,
+    show_popup: bool = True,
+):
+    if not unreal_engine.does_directory_contain_unreal_game(game_dir_path, probe):
+        # the popup is a Dear PyGui item, callers off the UI thread pass False
+        if show_popup and settings.has_inited_settings:
             init_not_an_unreal_game_popup(game_dir_path)
             dpg.split_frame()
             dpg.configure_item("not_an_unreal_game_pop_up", show=True)
@@ -79,35 +85,26 @@ def init_game_already_in_list_pop_up(game_directory: pathlib.Path):
     )
 
 
+def push_game_already_in_list_pop_up(game_directory: pathlib.Path):
+    if settings.has_inited_settings:
+        init_game_already_in_list_pop_up(game_directory)
+        dpg.split_frame()
+        dpg.configure_item("game_already_exists_popup", show=True)
+
+
 def game_already_in_list_check(game_directory: pathlib.Path) -> bool:
-    game_entries = settings.get_game_entries_in_settings()
-    normalized_new_game = os.path.normcase(os.path.normpath(str(game_directory)))
-
-    for game_entry in game_entries:
-        existing_game = os.path.normcase(os.path.normpath(game_entry["install_dir"]))
-        if existing_game == normalized_new_game:
-            if settings.has_inited_settings:
-                init_game_already_in_list_pop_up(game_directory)
-                dpg.split_frame()
-                dpg.configure_item("game_already_exists_popup", show=True)
-            return True
+    if settings.get_is_game_in_settings(game_directory):
+        push_game_already_in_list_pop_up(game_directory)
+        return True
     return False
 
 
 def game_already_in_list_check_multi(
     game_directory: pathlib.Path, input_settings
 ) -> bool:
-    game_entries = input_settings.get("games", [])
-    normalized_new_game = os.path.normcase(os.path.normpath(str(game_directory)))
-
-    for game_entry in game_entries:
-        existing_game = os.path.normcase(os.path.normpath(game_entry["install_dir"]))
-        if existing_game == normalized_new_game:
-            if settings.has_inited_settings:
-                init_game_already_in_list_pop_up(game_directory)
-                dpg.split_frame()
-                dpg.configure_item("game_already_exists_popup", show=True)
-            return True
+    if game_directory in settings.get_editable_game_registry(input_settings):
+        push_game_already_in_list_pop_up(game_directory)
+        return True
     return False
 
 
@@ -126,7 +123,6 @@ def add_manual_game_to_settings_file(game_dir_path: pathlib.Path) -> bool:
         was_valid = False
     if not was_valid:
         return was_valid
-    loaded_settings = settings.get_settings()
     game_entry = data_structures.GameInfo(
         install_dir=game_dir_path,
         game_title=os.path.basename(str(game_dir_path)),
@@ -137,13 +133,8 @@ def add_manual_game_to_settings_file(game_dir_path: pathlib.Path) -> bool:
         show_pre_releases=False,
         using_portable_version=False,
         using_keep_mods_and_settings=False,
-        installed_files=[],
     )
 
-    new_installed_files = []
-    for file in game_entry.installed_files:
-        new_installed_files.append(file)
-
     game_entry_dict = {
         "install_dir": os.path.normpath(str(game_entry.install_dir)),
         "game_title": game_entry.game_title,
@@ -152,14 +143,13 @@ def add_manual_game_to_settings_file(game_dir_path: pathlib.Path) -> bool:
         "using_developer_version": game_entry.using_developer_version,
         "show_pre_releases": game_entry.show_pre_releases,
         "using_keep_mods_and_settings": game_entry.using_keep_mods_and_settings,
-        "installed_files": new_installed_files,
     }
 
-    games_list = loaded_settings.get("games", [])
-    games_list.append(game_entry_dict)
-    loaded_settings["games"] = games_list
+    with settings.edit_settings() as loaded_settings:
+        registry = settings.get_editable_game_registry(loaded_settings)
+        registry.upsert(game_entry_dict)
+        settings.set_games_from_game_registry(loaded_settings, registry)
 
-    settings.save_settings(loaded_settings)
     return was_valid
 
 
@@ -168,7 +158,7 @@ def callback_directory_selected(sender, app_data):
     game_name = os.path.basename(game_directory)
     if add_manual_game_to_settings_file(game_directory):
         main_ue4ss_screen.add_new_game_to_games_list(
-            constants.GAME_PATHS_TO_DISPLAY_NAMES.get(game_name, game_name),
+            settings.get_game_display_name(str(game_directory), game_name),
             str(game_directory),
         )
         main_ue4ss_screen.refresh_game_list_scroll_box()
@@ -14,13 +14,14 @@ from ue4ss_installer_gui import (
     translator,
     file_io,
     auto_align,
+    ui_tasks,
+    logger,
 )
 from ue4ss_installer_gui.screens import (
     setup_screen,
     notification_screen,
     main_ue4ss_screen,
 )
-from ue4ss_installer_gui.checks import online_check
 
 
 def filter_ue4ss_tag(sender, app_data, user_data):
@@ -64,60 +65,27 @@ def push_install_failed_screen(user_data):
 
 
 def refresh_file_to_install_combo_box(user_data):
-    filter = dpg.get_value("filter_ue4ss_file_to_install")
+    filter = dpg.get_value("filter_ue4ss_file_to_install").lower()
     game_info = settings.get_game_info_instance_in_settings_from_game_directory(
         user_data
     )
     selected_tag = dpg.get_value("tags_combo_box")
 
-    if not game_info or ue4ss.cached_repo_releases_info is None:
+    catalog = ue4ss.cached_release_catalog
+    if not game_info or catalog is None or selected_tag not in catalog.releases_by_tag:
         return
 
-    tag_info = next(
-        (
-            tag
-            for tag in ue4ss.cached_repo_releases_info.tags
-            if tag.tag == selected_tag
-        ),
-        None,
-    )
-    if not tag_info:
-        return
-
-    default_items = []
-
-    for asset in tag_info.assets:
-        filename = asset.file_name
-        lower = filename.lower()
-        is_dev = "dev" in lower
-
-        if (game_info.using_developer_version and is_dev) or (
-            not game_info.using_developer_version and not is_dev
-        ):
-            if lower not in ["zcustomgameconfigs.zip", "zmapgenbp.zip"]:
-                default_items.append((filename, asset.created_at))
-
-    default_items.sort(key=lambda x: x[1], reverse=True)
-
-    sorted_filenames = [filename for filename, _ in default_items]
-
-    filtered_filenames = [
-        filename for filename in sorted_filenames if filter.lower() in filename.lower()
-    ]
-
-    if not game_info.using_developer_version:
-        portable_enabled = dpg.get_value("portable_version_check_box")
-
-        if portable_enabled:
-            filtered_filenames = [
-                filename for filename in filtered_filenames if "Standard" in filename
-            ]
-        else:
-            filtered_filenames = [
-                filename
-                for filename in filtered_filenames
-                if "Standard" not in filename
-            ]
+    if game_info.using_developer_version:
+        filtered_filenames = catalog.get_installable_file_names(selected_tag, True)
+    else:
+        # portable builds are the "Standard" zips
+        filtered_filenames = catalog.get_installable_file_names(
+            selected_tag, False, dpg.get_value("portable_version_check_box")
+        )
+    if filter:
+        filtered_filenames = [
+            filename for filename in filtered_filenames if filter in filename.lower()
+        ]
 
     if filtered_filenames:
         default_value = (
@@ -131,6 +99,10 @@ def refresh_file_to_install_combo_box(user_data):
             default_value=default_value,
         )
     else:
+        # nothing matched, offer every file of the tag for the dev choice
+        sorted_filenames = catalog.get_installable_file_names(
+            selected_tag, game_info.using_developer_version
+        )
         if len(sorted_filenames) > 1:
             default_value = (
                 game_info.last_installed_version
@@ -153,12 +125,14 @@ def refresh_file_to_install_combo_box(user_data):
 def update_game_info_field_from_ui(
     game_directory: str, field_name: str, value, should_save: bool = True
 ):
-    game_info = settings.get_game_info_instance_in_settings_from_game_directory(
-        game_directory
-    )
-    if game_info:
-        setattr(game_info, field_name, value)
-        settings.save_game_info_to_settings_file(game_info)
+    update_game_info_fields_from_ui(game_directory, **{field_name: value})
+
+
+def update_game_info_fields_from_ui(game_directory: str, **fields):
+    with settings.edit_game(game_directory) as game_info:
+        if game_info:
+            for field_name, value in fields.items():
+                setattr(game_info, field_name, value)
 
 
 def on_ue4ss_version_tag_combo_box_selected(sender, app_data, user_data):
@@ -169,21 +143,25 @@ def on_ue4ss_version_tag_combo_box_selected(sender, app_data, user_data):
 
 
 def on_developer_check_box_toggled(sender, app_data, user_data):
-    update_game_info_field_from_ui(user_data, "using_developer_version", app_data)
-
     if app_data:
         dpg.set_value("portable_version_check_box", False)
-        update_game_info_field_from_ui(user_data, "using_portable_version", False)
+        update_game_info_fields_from_ui(
+            user_data, using_developer_version=app_data, using_portable_version=False
+        )
+    else:
+        update_game_info_field_from_ui(user_data, "using_developer_version", app_data)
 
     refresh_file_to_install_combo_box(user_data)
 
 
 def on_portable_version_check_box_toggled(sender, app_data, user_data):
-    update_game_info_field_from_ui(user_data, "using_portable_version", app_data)
-
     if app_data:
         dpg.set_value("developer_version_check_box", False)
-        update_game_info_field_from_ui(user_data, "using_developer_version", False)
+        update_game_info_fields_from_ui(
+            user_data, using_portable_version=app_data, using_developer_version=False
+        )
+    else:
+        update_game_info_field_from_ui(user_data, "using_portable_version", app_data)
 
     refresh_file_to_install_combo_box(user_data)
 
@@ -200,8 +178,9 @@ def on_using_pre_releases_check_box_toggled(sender, app_data, user_data):
 
 def install_ue4ss_through_zip(user_data):
     file_io.unzip_zip(user_data[1], get_exe_dir_from_game_dir(user_data[0]))
-    all_paths_in_zip = file_io.get_paths_of_files_in_zip(user_data[1])
-    update_game_info_field_from_ui(user_data[0], "installed_files", all_paths_in_zip)
+    settings.install_manifest_store.save(
+        user_data[0], file_io.get_install_manifest_entries_from_zip(user_data[1])
+    )
 
 
 def delete_all_empty_dirs_in_dir_tree(root: pathlib.Path):
@@ -220,7 +199,11 @@ def uninstall_ue4ss(user_data):
     if game_info is None:
         raise RuntimeError("game info is none, uninstall ue4ss function")
 
-    for file_to_delete in game_info.installed_files:
+    installed_files = [
+        entry.path for entry in settings.install_manifest_store.load(user_data)
+    ]
+
+    for file_to_delete in installed_files:
         file_to_delete_actual_path = os.path.normpath(f"{exe_dir}/{file_to_delete}")
         if os.path.isfile(file_to_delete_actual_path):
             os.remove(file_to_delete_actual_path)
@@ -253,14 +236,14 @@ def uninstall_ue4ss(user_data):
             break
 
     if did_uninstall_work:
-        for file_to_delete in game_info.installed_files:
+        for file_to_delete in installed_files:
             file_to_delete_actual_path = os.path.normpath(f"{exe_dir}/{file_to_delete}")
             if os.path.isfile(file_to_delete_actual_path):
                 did_uninstall_work = False
                 break
 
     if did_uninstall_work:
-        update_game_info_field_from_ui(user_data, "installed_files", [])
+        settings.install_manifest_store.delete(user_data)
     else:
         push_uninstall_failed_screen(user_data=user_data)
 
@@ -271,33 +254,34 @@ def install_ue4ss(user_data):
     exe_dir = get_exe_dir_from_game_dir(user_data)
     ue4ss_zip_path = pathlib.Path(f"{file_io.SCRIPT_DIR}/temp/ue4ss.zip")
     file_io.unzip_zip(ue4ss_zip_path, exe_dir)
-    all_paths_in_zip = file_io.get_paths_of_files_in_zip(ue4ss_zip_path)
-    install_was_successful = True
-    for file in all_paths_in_zip:
-        if not os.path.isfile(os.path.normpath(f"{exe_dir}/{file}")):
-            install_was_successful = False
-            break
-    if not install_was_successful:
+    settings.install_manifest_store.save(
+        user_data, file_io.get_install_manifest_entries_from_zip(ue4ss_zip_path)
+    )
+    if settings.install_manifest_store.verify(user_data, exe_dir):
         push_install_failed_screen(user_data=user_data)
-    update_game_info_field_from_ui(user_data, "installed_files", all_paths_in_zip)
 
 
 def download_ue4ss(user_data):
     game_info = settings.get_game_info_instance_in_settings_from_game_directory(
         user_data
     )
-    if game_info:
-        os.makedirs(str(file_io.get_temp_dir()), exist_ok=True)
-        file_names_to_download_links = ue4ss.get_file_name_to_download_links_from_tag(
-            game_info.ue4ss_version
-        )
-        download_link = file_names_to_download_links.get(
-            game_info.last_installed_version
+    if game_info is None:
+        raise RuntimeError("game info is none, download ue4ss function")
+    os.makedirs(str(file_io.get_temp_dir()), exist_ok=True)
+    temp_zip_path = os.path.normpath(f"{str(file_io.get_temp_dir())}/ue4ss.zip")
+    # a zip left by an earlier install must never be installed in place of this one
+    if os.path.isfile(temp_zip_path):
+        os.remove(temp_zip_path)
+    try:
+        asset_path = ue4ss.get_release_asset_path(
+            game_info.ue4ss_version, game_info.last_installed_version
         )
-        file_io.download_file(
-            download_link,
-            os.path.normpath(f"{str(file_io.get_temp_dir())}/ue4ss.zip"),
+        shutil.copyfile(asset_path, temp_zip_path)
+    except Exception as e:
+        logger.log_message(
+            f"Failed to download {game_info.last_installed_version} -> {e}"
         )
+        raise
 
 
 def clean_up_temp_files(user_data):
@@ -311,10 +295,12 @@ def clean_up_temp_files(user_data):
 def push_installing_from_zip_screen(sender, app_data, user_data):
     last_installed_file = ""  # have this use provided file later
     ue4ss_version = ""  # have this use provided file later
-    update_game_info_field_from_ui(
-        user_data, "last_installed_version", last_installed_file
+    update_game_info_fields_from_ui(
+        user_data,
+        last_installed_version=last_installed_file,
+        ue4ss_version=ue4ss_version,
     )
-    update_game_info_field_from_ui(user_data, "ue4ss_version", ue4ss_version)
+    settings.flush_settings()
     screen_tag = "installing_ue4ss_from_zip_modal"
     if dpg.does_item_exist(screen_tag):
         dpg.delete_item(screen_tag)
@@ -367,10 +353,12 @@ def push_installing_screen(sender, app_data, user_data):
     if last_installed_file is None or last_installed_file == "":
         return
     ue4ss_version = dpg.get_value("tags_combo_box")
-    update_game_info_field_from_ui(
-        user_data, "last_installed_version", last_installed_file
+    update_game_info_fields_from_ui(
+        user_data,
+        last_installed_version=last_installed_file,
+        ue4ss_version=ue4ss_version,
     )
-    update_game_info_field_from_ui(user_data, "ue4ss_version", ue4ss_version)
+    settings.flush_settings()
     screen_tag = "installing_ue4ss_modal"
     if dpg.does_item_exist(screen_tag):
         dpg.delete_item(screen_tag)
@@ -378,6 +366,7 @@ def push_installing_screen(sender, app_data, user_data):
         tag=screen_tag,
         task_text=translator.translator.translate("installing_ue4ss_task_text"),
         finished_all_steps_function=push_install_successful_screen,
+        failed_step_function=push_install_failed_screen,
         user_data=user_data,
         step_text_to_step_functions={
             translator.translator.translate(
@@ -399,10 +388,12 @@ def push_installing_screen(sender, app_data, user_data):
 def push_reinstalling_screen(sender, app_data, user_data):
     last_installed_file = dpg.get_value("ue4ss_file_to_install_combo_box")
     ue4ss_version = dpg.get_value("tags_combo_box")
-    update_game_info_field_from_ui(
-        user_data, "last_installed_version", last_installed_file
+    update_game_info_fields_from_ui(
+        user_data,
+        last_installed_version=last_installed_file,
+        ue4ss_version=ue4ss_version,
     )
-    update_game_info_field_from_ui(user_data, "ue4ss_version", ue4ss_version)
+    settings.flush_settings()
     screen_tag = "reinstalling_ue4ss_modal"
     if dpg.does_item_exist(screen_tag):
         dpg.delete_item(screen_tag)
@@ -410,6 +401,7 @@ def push_reinstalling_screen(sender, app_data, user_data):
         tag=screen_tag,
         task_text=translator.translator.translate("reinstalling_ue4ss_task_text"),
         finished_all_steps_function=push_install_successful_screen,
+        failed_step_function=push_install_failed_screen,
         user_data=user_data,
         step_text_to_step_functions={
             translator.translator.translate(
@@ -429,6 +421,7 @@ def push_reinstalling_screen(sender, app_data, user_data):
 
 
 def push_uninstalling_screen(sender, app_data, user_data):
+    settings.flush_settings()
     screen_tag = "uninstalling_ue4ss_modal"
     if dpg.does_item_exist(screen_tag):
         dpg.delete_item(screen_tag)
@@ -445,6 +438,18 @@ def push_uninstalling_screen(sender, app_data, user_data):
     )
 
 
+def refresh_configure_game_screen_with_versions(game_directory):
+    """
+    Rebuilds the configure modal once releases have loaded, if it is still open for
+    the same game.
+    """
+    if not dpg.does_item_exist("configure_game_modal"):
+        return
+    if dpg.get_item_user_data("configure_game_modal") != str(game_directory):
+        return
+    push_configure_game_screen(None, None, game_directory)
+
+
 def dismiss_configure_game_modal():
     dpg.delete_item("configure_game_modal")
 
@@ -453,7 +458,7 @@ def push_configure_game_screen(sender, app_data, user_data):
     game_info = settings.get_game_info_instance_in_settings_from_game_directory(
         str(user_data)
     )
-    if online_check.is_online:
+    if ue4ss.is_release_catalog_available():
         pos_y = 120
     else:
         pos_y = 260
@@ -463,6 +468,7 @@ def push_configure_game_screen(sender, app_data, user_data):
         dpg.add_window(
             modal=True,
             tag="configure_game_modal",
+            user_data=str(user_data),
             no_title_bar=True,
             min_size=[524, 1],
             max_size=[524, 999],
@@ -473,21 +479,10 @@ def push_configure_game_screen(sender, app_data, user_data):
             no_resize=True,
         )
 
-        install_dir = str(game_info.install_dir)
-        matched = False
-
-        centered_game_name_text = "default centered game name text"
-
-        for game_key in constants.GAME_PATHS_TO_DISPLAY_NAMES.keys():
-            if game_key in install_dir:
-                centered_game_name_text = (
-                    f"Game: {str(constants.GAME_PATHS_TO_DISPLAY_NAMES[game_key])}"
-                )
-                matched = True
-                break
-
-        if not matched:
-            centered_game_name_text = f"Game: {game_info.game_title}"
+        game_display_name = settings.get_game_display_name(
+            str(game_info.install_dir), game_info.game_title
+        )
+        centered_game_name_text = f"Game: {game_display_name}"
 
         auto_align.add_multi_line_centered_text(
             centered_game_name_text, parent="configure_game_modal"
@@ -502,7 +497,7 @@ def push_configure_game_screen(sender, app_data, user_data):
 
         dpg.add_spacer(parent="configure_game_modal")
 
-        if online_check.is_online:
+        if ue4ss.is_release_catalog_available():
             auto_align.add_centered_text(
                 translator.translator.translate("ue4ss_version_text_label"),
                 parent="configure_game_modal",
@@ -510,10 +505,9 @@ def push_configure_game_screen(sender, app_data, user_data):
 
             dpg.add_spacer(parent="configure_game_modal")
 
-            if game_info.show_pre_releases:
-                combo_items = ue4ss.get_all_tags_with_assets()
-            else:
-                combo_items = ue4ss.get_normal_release_tags_with_assets()
+            combo_items = ue4ss.get_release_catalog().get_tags_with_assets(
+                game_info.show_pre_releases
+            )
             if game_info.ue4ss_version in combo_items:
                 default_combo_item = game_info.ue4ss_version
             else:
@@ -620,6 +614,22 @@ def push_configure_game_screen(sender, app_data, user_data):
                 )
 
             dpg.add_spacer(parent="configure_game_modal")
+        elif ue4ss.is_loading_repo_releases_info():
+            dpg.add_button(
+                label="Loading versions...",
+                enabled=False,
+                width=-1,
+                height=28,
+                parent="configure_game_modal",
+            )
+            dpg.add_spacer(parent="configure_game_modal")
+            ue4ss.add_repo_releases_info_ready_callback(
+                lambda: ui_tasks.post_ui_task(
+                    refresh_configure_game_screen_with_versions,
+                    user_data,
+                    coalesce_key="configure_game_versions",
+                )
+            )
 
         is_installed = get_should_show_uninstall_button(user_data)
         online_and_installed_buttons: dict[
@@ -706,7 +716,8 @@ def push_configure_game_screen(sender, app_data, user_data):
             }
         }
 
-        is_online = online_check.is_online
+        # offline, the release cache still allows installs of downloaded assets
+        is_online = ue4ss.is_release_catalog_available()
 
         if is_online and is_installed:
             button_set_one = online_and_installed_buttons
@@ -806,10 +817,7 @@ def get_should_show_uninstall_button(game_directory: pathlib.Path) -> bool:
         str(game_directory)
     )
     if game_info:
-        if len(game_info.installed_files) > 0:
-            return True
-        else:
-            return False
+        return settings.install_manifest_store.has_manifest(game_directory)
     no_game_info_error = (
         "No game info, when get should show uninstall button was pressed."
     )
@@ -817,20 +825,21 @@ def get_should_show_uninstall_button(game_directory: pathlib.Path) -> bool:
 
 
 def refresh_ue4ss_tags_combo_box(user_data):
-    filter = dpg.get_value("filter_ue4ss_tag")
+    filter = dpg.get_value("filter_ue4ss_tag").lower()
     game_info = settings.get_game_info_instance_in_settings_from_game_directory(
         user_data
     )
 
-    if not game_info:
+    if not game_info or ue4ss.cached_release_catalog is None:
         return
 
-    if game_info.show_pre_releases:
-        all_tags = ue4ss.get_all_tags_with_assets()
-    else:
-        all_tags = ue4ss.get_normal_release_tags_with_assets()
+    all_tags = ue4ss.cached_release_catalog.get_tags_with_assets(
+        game_info.show_pre_releases
+    )
 
-    filtered_tags = [tag for tag in all_tags if filter.lower() in tag.lower()]
+    filtered_tags = (
+        [tag for tag in all_tags if filter in tag.lower()] if filter else all_tags
+    )
 
     dpg.configure_item("tags_combo_box", items=filtered_tags)
 
@@ -847,17 +856,7 @@ def refresh_ue4ss_tags_combo_box(user_data):
 
 
 def get_exe_dir_from_game_dir(game_directory: pathlib.Path) -> pathlib.Path:
-    engine_dir = game_directory / "Engine"
-
-    for subdir in game_directory.rglob("*"):
-        if subdir.is_dir():
-            if engine_dir in subdir.parents:
-                continue
-
-            if subdir.name == "Win64" or subdir.name == "WinGDK":
-                return subdir
-
-    return pathlib.Path("")
+    return settings.get_game_exe_dir(pathlib.Path(game_directory))
 
 
 def open_game_paks_dir(sender, app_data, game_directory: pathlib.Path):
@@ -19,6 +19,7 @@ def push_main_app_screen():
         autosize=True,
     ):
         if settings.get_use_automatic_game_scanning_in_settings():
-            scanning_for_games.push_scanning_for_games_modal_screen()
+            main_ue4ss_screen.push_main_screen()
+            scanning_for_games.start_background_game_scanning()
         else:
             main_ue4ss_screen.push_main_screen()
@@ -46,6 +46,7 @@ def change_font_button_selected(sender, app_data, user_data):
 
 
 def open_settings_file_in_default_text_editor(sender, app_data, user_data):
+    settings.flush_settings()
     settings_path = settings.SETTINGS_FILE
 
     if not os.path.isfile(settings_path):
@@ -65,6 +66,11 @@ def open_settings_file_in_default_text_editor(sender, app_data, user_data):
         print(f"Failed to open settings file: {e}")
 
 
+def push_settings_file_text_editor_screen(sender, app_data, user_data):
+    settings.flush_settings()
+    text_editor_screen.push_text_editor_screen(sender, app_data, user_data)
+
+
 def close_main_settings_menu():
     dpg.delete_item("main_settings_screen")
 
@@ -161,6 +167,18 @@ def push_main_settings_screen():
             )
             dpg.add_text("Use automatic game detection scanning")
 
+        with dpg.group(horizontal=True):
+            dpg.add_text(default_value="Game scan worker threads")
+            dpg.add_input_int(
+                default_value=settings.get_scan_worker_count_from_settings(),
+                min_value=1,
+                max_value=settings.MAX_SCAN_WORKER_COUNT,
+                min_clamped=True,
+                max_clamped=True,
+                width=-1,
+                callback=settings.scan_worker_count_changed,
+            )
+
         with dpg.group(horizontal=False):
             dpg.add_spacer(height=2)
             dpg.add_separator()
@@ -207,7 +225,7 @@ def push_main_settings_screen():
                     "label": "Edit settings file",
                     "width": -1,
                     "height": 28,
-                    "callback": text_editor_screen.push_text_editor_screen,
+                    "callback": push_settings_file_text_editor_screen,
                     "user_data": screen_info,
                 }
             },
@@ -119,11 +119,35 @@ def init_main_screen_game_list_scroll_box():
     refresh_game_list_scroll_box()
 
 
+def init_scan_progress_row():
+    with dpg.group(horizontal=True, parent="GameListScroll"):
+        dpg.add_progress_bar(
+            tag="ScanProgressBar",
+            default_value=scanning_for_games.get_scan_progress(),
+            overlay="Scanning for games...",
+            width=-96,
+            height=28,
+        )
+        dpg.add_button(
+            label="Cancel",
+            tag="ScanCancelButton",
+            width=-1,
+            height=28,
+            callback=scanning_for_games.cancel_game_scanning,
+        )
+    dpg.add_spacer(height=6, parent="GameListScroll")
+
+
 def refresh_game_list_scroll_box():
     global used_game_button_strings
+    if not dpg.does_item_exist("GameListScroll"):
+        return
     used_game_button_strings.clear()
     dpg.delete_item("GameListScroll", children_only=True)
 
+    if scanning_for_games.is_game_scan_running():
+        init_scan_progress_row()
+
     install_dirs_to_game_titles = settings.get_install_dirs_to_game_titles()
 
     sorted_items = sorted(
@@ -152,19 +176,16 @@ def push_custom_games_dir_dir_selector(sender, app_data, user_data):
 
 
 def add_custom_game_directory(games_dir):
-    loaded_settings = settings.get_settings()
-    extra_games_dirs_to_scan = settings.get_custom_game_directories()
-    extra_games_dirs_to_scan.append(games_dir)
-    loaded_settings["custom_game_directories"] = extra_games_dirs_to_scan
-    settings.save_settings(loaded_settings)
+    with settings.edit_settings() as loaded_settings:
+        extra_games_dirs_to_scan = loaded_settings.get("custom_game_directories", [])
+        extra_games_dirs_to_scan.append(games_dir)
+        loaded_settings["custom_game_directories"] = extra_games_dirs_to_scan
     games_list_path = []
     for game_path in unreal_engine.get_all_unreal_game_directories_in_directory_tree(
-        games_dir
+        games_dir, **settings.get_custom_scan_discovery_options()
     ):
         games_list_path.append(pathlib.Path(game_path))
-    settings.save_settings(
-        scanning_for_games.add_manual_games_to_settings_file(games_list_path)
-    )
+    scanning_for_games.add_manual_games_to_settings_file(games_list_path)
 
 
 def add_games_dir_to_scan_list(sender, app_data, user_data):
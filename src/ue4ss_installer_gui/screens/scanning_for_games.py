@@ -4,54 +4,159 @@ import threading
 
 import dearpygui.dearpygui as dpg
 
-from ue4ss_installer_gui import settings, constants, data_structures, ue4ss
+from ue4ss_installer_gui import (
+    logger,
+    settings,
+    data_structures,
+    ue4ss,
+    directory_probe,
+    game_scanning,
+    steam,
+    epic,
+    ui_tasks,
+)
 from ue4ss_installer_gui.screens import main_ue4ss_screen, add_game
 
 
-def push_scanning_for_games_modal_screen():
-    if dpg.does_item_exist("scanning_for_games_screen"):
-        dpg.delete_item("scanning_for_games_screen")
+# context of the running background scan, None while no scan runs
+running_scan_context: game_scanning.ScanContext | None = None
+scan_progress = 0.0
 
-    with dpg.window(
-        tag="scanning_for_games_screen",
-        no_title_bar=True,
-        no_open_over_existing_popup=False,
-        width=constants.WINDOW_WIDTH - 18,
-        height=constants.WINDOW_HEIGHT - 47,
-        no_move=True,
-    ):
-        dpg.add_spacer(height=300)
-        dpg.add_button(label="Scanning for games...", height=28, width=-1)
 
-    threading.Thread(target=async_init_game_scanning, daemon=True).start()
+def is_game_scan_running() -> bool:
+    return running_scan_context is not None
 
 
-def init_game_scanning():
-    games_to_add = settings.collect_games_to_add()
-    games_to_remove = settings.collect_games_to_remove()
+def get_scan_progress() -> float:
+    return scan_progress
 
-    game_directories = games_to_remove
-    loaded_settings = add_manual_games_to_settings_file(games_to_add)
-    updated_settings = settings.remove_game_entries_by_game_dirs(
-        game_directories, loaded_settings
-    )
-
-    settings.save_settings(updated_settings)
 
-
-def async_init_game_scanning():
-    init_game_scanning()
-    dpg.delete_item("scanning_for_games_screen")
-    main_ue4ss_screen.push_main_screen()
+def start_background_game_scanning():
+    """
+    Scans in a background thread while the main screen stays usable, each game found
+    or removed is saved and shown as soon as its check finishes.
+    """
+    global running_scan_context, scan_progress
+    if running_scan_context is not None:
+        return
+    running_scan_context = game_scanning.ScanContext(
+        cache=game_scanning.scan_cache_store
+    )
+    scan_progress = 0.0
+    threading.Thread(
+        target=run_game_scanning,
+        args=(running_scan_context,),
+        daemon=True,
+        name="game_scan_events",
+    ).start()
+    post_game_list_refresh()
+
+
+def cancel_game_scanning(sender=None, app_data=None, user_data=None):
+    if running_scan_context is not None:
+        running_scan_context.cancel_event.set()
+        if dpg.does_item_exist("ScanCancelButton"):
+            dpg.configure_item("ScanCancelButton", enabled=False, label="Cancelling...")
+
+
+def post_game_list_refresh():
+    ui_tasks.post_ui_task(
+        main_ue4ss_screen.refresh_game_list_scroll_box, coalesce_key="game_list"
+    )
 
 
-def add_manual_games_to_settings_file(game_dir_paths: list[pathlib.Path]) -> dict:
+def update_scan_progress_bar():
+    if dpg.does_item_exist("ScanProgressBar"):
+        dpg.set_value("ScanProgressBar", scan_progress)
+
+
+def run_game_scanning(context: game_scanning.ScanContext):
+    global running_scan_context, scan_progress
+    try:
+        for event in game_scanning.iter_scan_events(context):
+            if isinstance(event, game_scanning.ScanProgressEvent):
+                if event.task_count:
+                    scan_progress = event.completed_task_count / event.task_count
+                    ui_tasks.post_ui_task(
+                        update_scan_progress_bar, coalesce_key="scan_progress"
+                    )
+            elif event.kind == game_scanning.SCAN_EVENT_GAME_FOUND:
+                # runs on the scan thread, so no invalid game popup
+                new_game_entries = get_new_game_entries(
+                    [event.game_dir], context.probe, show_invalid_game_popup=False
+                )
+                if not new_game_entries:
+                    continue
+                with settings.edit_settings() as loaded_settings:
+                    registry = settings.get_editable_game_registry(loaded_settings)
+                    registry.upsert_many(new_game_entries)
+                    settings.set_games_from_game_registry(loaded_settings, registry)
+                post_game_list_refresh()
+            elif event.kind == game_scanning.SCAN_EVENT_GAME_REMOVED:
+                with settings.edit_settings() as loaded_settings:
+                    registry = settings.get_editable_game_registry(loaded_settings)
+                    registry.delete_many([event.game_dir])
+                    settings.set_games_from_game_registry(loaded_settings, registry)
+                post_game_list_refresh()
+        # a cancelled scan saw only part of the cache, saving would drop the rest
+        if context.cache is not None and not context.cancel_event.is_set():
+            context.cache.save()
+        # games saved while the release fetch was still running
+        if not ue4ss.is_loading_repo_releases_info():
+            ue4ss.resolve_latest_ue4ss_versions_in_settings()
+    except Exception as e:
+        logger.log_message(f"Game scan failed: {e}")
+    finally:
+        running_scan_context = None
+        post_game_list_refresh()
+
+
+def add_manual_games_to_settings_file(game_dir_paths: list[pathlib.Path]):
+    new_game_entries = get_new_game_entries(game_dir_paths)
+
+    with settings.edit_settings() as loaded_settings:
+        registry = settings.get_editable_game_registry(loaded_settings)
+        registry.upsert_many(new_game_entries)
+        settings.set_games_from_game_registry(loaded_settings, registry)
+
+
+def get_launcher_title_and_platform(
+    game_dir_path: pathlib.Path,
+) -> tuple[str, data_structures.GamePlatforms]:
+    """
+    Title and platform from the launcher data found by the last scan, falls back to
+    the folder name.
+    """
+    steam_game_title = steam.get_steam_game_title_for_game_dir(game_dir_path)
+    if steam_game_title is not None:
+        return steam_game_title, data_structures.GamePlatforms.STEAM
+
+    epic_game_title = epic.get_epic_game_title_for_game_dir(game_dir_path)
+    if epic_game_title is not None:
+        return epic_game_title, data_structures.GamePlatforms.EPIC
+
+    game_title = os.path.basename(os.path.normpath(str(game_dir_path)))
+    shortcut_name = steam.get_steam_shortcut_name_for_game_dir(game_dir_path)
+    if shortcut_name is not None:
+        game_title = shortcut_name
+    return game_title, data_structures.GamePlatforms.OTHER
+
+
+def get_new_game_entries(
+    game_dir_paths: list[pathlib.Path],
+    probe: directory_probe.DirectoryProbe | None = None,
+    show_invalid_game_popup: bool = True,
+) -> list[dict]:
+    if probe is None:
+        probe = directory_probe.DirectoryProbe()
     bool_list = []
-    loaded_settings = settings.get_settings()
+    new_game_entries = []
     for game_dir_path in game_dir_paths:
-        if (
-            not os.path.isdir(game_dir_path)
-            or str(game_dir_path)[0] == str(game_dir_path)[0].lower()
+        # Windows paths are expected to start with an upper case drive letter, POSIX
+        # paths all start with "/"
+        if not probe.is_dir(game_dir_path) or (
+            settings.is_windows()
+            and str(game_dir_path)[0] == str(game_dir_path)[0].lower()
         ):
             bool_list.append(False)
             continue
@@ -60,7 +165,9 @@ def add_manual_games_to_settings_file(game_dir_paths: list[pathlib.Path]) -> dic
 
         # if game_already_in_list_check_multi(game_dir_path, loaded_settings):
         #     was_valid = False
-        if not add_game.game_dir_actually_has_unreal_game_check(game_dir_path):
+        if not add_game.game_dir_actually_has_unreal_game_check(
+            game_dir_path, probe, show_popup=show_invalid_game_popup
+        ):
             was_valid = False
 
         bool_list.append(was_valid)
@@ -68,17 +175,18 @@ def add_manual_games_to_settings_file(game_dir_paths: list[pathlib.Path]) -> dic
         if not was_valid:
             continue
 
+        game_title, platform = get_launcher_title_and_platform(game_dir_path)
+
         game_entry = data_structures.GameInfo(
             install_dir=game_dir_path,
-            game_title=os.path.basename(os.path.normpath(str(game_dir_path))),
+            game_title=game_title,
             ue4ss_version=ue4ss.get_default_ue4ss_version_tag(),
             last_installed_version="",
-            platform=data_structures.GamePlatforms.OTHER,
+            platform=platform,
             using_developer_version=False,
             show_pre_releases=False,
             using_portable_version=False,
             using_keep_mods_and_settings=False,
-            installed_files=[],
         )
 
         game_entry_dict = {
@@ -89,11 +197,8 @@ def add_manual_games_to_settings_file(game_dir_paths: list[pathlib.Path]) -> dic
             "using_developer_version": game_entry.using_developer_version,
             "show_pre_releases": game_entry.show_pre_releases,
             "using_keep_mods_and_settings": game_entry.using_keep_mods_and_settings,
-            "installed_files": [],
         }
 
-        games_list = loaded_settings.get("games", [])
-        games_list.append(game_entry_dict)
-        loaded_settings["games"] = games_list
+        new_game_entries.append(game_entry_dict)
 
-    return loaded_settings
+    return new_game_entries
@@ -1,6 +1,8 @@
 from typing import Protocol, Any
 import dearpygui.dearpygui as dpg
 
+from ue4ss_installer_gui import logger
+
 
 class StepFunction(Protocol):
     def __call__(self, user_data: Any) -> None: ...
@@ -12,6 +14,7 @@ def push_setup_screen(
     step_text_to_step_functions: dict[str, StepFunction],
     finished_all_steps_function: StepFunction,
     user_data: Any,
+    failed_step_function: StepFunction | None = None,
 ):
     tags = ["task_text", "step_text", "progress_bar", tag]
 
@@ -47,7 +50,16 @@ def push_setup_screen(
         for i, step_name in enumerate(step_keys):
             dpg.set_item_label("step_text", step_name)
             function_to_call = step_text_to_step_functions[step_name]
-            function_to_call(user_data)
+            try:
+                function_to_call(user_data)
+            except Exception as e:
+                logger.log_message(f"Setup step {step_name} failed: {e}")
+                if failed_step_function is None:
+                    raise
+                # later steps would act on what the failed step did not produce
+                dpg.set_item_label("step_text", "Setup failed.")
+                failed_step_function(user_data)
+                return
             progress += step_increment
             dpg.set_value("progress_bar", progress)
 
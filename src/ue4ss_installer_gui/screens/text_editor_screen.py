@@ -1,6 +1,8 @@
+import os
+
 import dearpygui.dearpygui as dpg
 
-from ue4ss_installer_gui import file_io
+from ue4ss_installer_gui import file_io, settings
 
 
 def cancel_text_edit_callback(sender, app_data, user_data):
@@ -9,7 +11,14 @@ def cancel_text_edit_callback(sender, app_data, user_data):
 
 def save_text_edit_callback(sender, app_data, user_data):
     text_value = dpg.get_value("text_editor_input")
-    file_io.save_content_to_file(content=text_value, file_path=user_data["file_path"])
+    if os.path.normpath(user_data["file_path"]) == os.path.normpath(
+        settings.SETTINGS_FILE
+    ):
+        settings.write_settings_file_text(text_value)
+    else:
+        file_io.save_content_to_file(
+            content=text_value, file_path=user_data["file_path"]
+        )
     user_data["finished_callback"]()
 
 
@@ -1,18 +1,24 @@
 import os
+import atexit
+import contextlib
 import tomlkit
 import pathlib
 import platform
+from typing import Iterator
 
 from platformdirs import user_config_dir
 
 from ue4ss_installer_gui import (
     logger,
-    steam,
-    epic,
-    unreal_engine,
-    ue4ss,
     constants,
     data_structures,
+    settings_store,
+    settings_journal,
+    file_io,
+    game_registry,
+    install_manifests,
+    display_names,
+    unreal_engine,
 )
 
 
@@ -22,6 +28,32 @@ os.makedirs(config_dir, exist_ok=True)
 
 SETTINGS_FILE = os.path.join(config_dir, "settings.toml")
 
+SETTINGS_JOURNAL_FILE = os.path.join(config_dir, "settings.journal")
+
+INSTALL_MANIFESTS_DIR = os.path.join(config_dir, "install_manifests")
+
+STEAM_APPINFO_INDEX_FILE = os.path.join(config_dir, "steam_appinfo_index.json")
+
+SCAN_CACHE_FILE = os.path.join(config_dir, "scan_cache.json")
+
+DISPLAY_NAME_OVERRIDES_DIR = os.path.join(config_dir, "display_name_overrides")
+
+RELEASE_CACHE_DIR = os.path.join(config_dir, "release_cache")
+
+SETTINGS_WRITE_DELAY_SECONDS = 0.5
+
+SETTINGS_JOURNAL_MAX_ENTRIES = 64
+
+# scanning is bound by disk and network latency rather than CPU, so a few more
+# workers than cores keeps every drive busy
+DEFAULT_SCAN_WORKER_COUNT = min(8, (os.cpu_count() or 1) + 4)
+
+MAX_SCAN_WORKER_COUNT = 32
+
+DEFAULT_SLOW_MOUNT_SCAN_TIMEOUT_SECONDS = 10.0
+
+DEFAULT_RELEASE_CACHE_TTL_SECONDS = 60 * 60
+
 
 # def get_valid_language_options() -> list[str]:
 #     specified_dir = os.path.normpath(f'{file_io.SCRIPT_DIR}/assets/localization')
@@ -62,8 +94,7 @@ def make_settings_file():
 
     toml_str = tomlkit.dumps(settings)
 
-    with open(SETTINGS_FILE, "w") as f:
-        f.write(toml_str)
+    file_io.write_file_atomically(toml_str, SETTINGS_FILE)
     logger.log_message(f"Settings file created at {SETTINGS_FILE}")
 
 
@@ -92,131 +123,168 @@ def to_pretty_toml(data: dict):
     return table
 
 
-def save_settings(settings_dictionary: dict):
-    pretty_data = to_pretty_toml(settings_dictionary)
-    toml_str = tomlkit.dumps(pretty_data)
-
-    with open(SETTINGS_FILE, "w", encoding="utf-8") as f:
-        f.write(toml_str)
+def update_toml_container(container, data: dict):
+    """
+    Updates a tomlkit container in place to match data, untouched keys keep their
+    formatting and comments.
+    """
+    for key in [key for key in container if key not in data]:
+        del container[key]
 
-    logger.log_message(f"Settings saved to {SETTINGS_FILE}")
+    for key, value in data.items():
+        existing_value = container.get(key)
+        if isinstance(value, dict) and isinstance(existing_value, dict):
+            update_toml_container(existing_value, value)
+        elif existing_value is None or settings_store.to_plain(existing_value) != value:
+            container[key] = to_toml_value(value)
+
+
+def serialize_settings(
+    settings_dictionary: dict, document: tomlkit.TOMLDocument | None = None
+) -> str:
+    if document is None:
+        return tomlkit.dumps(to_pretty_toml(settings_dictionary))
+    update_toml_container(document, settings_dictionary)
+    return tomlkit.dumps(document)
+
+
+store = settings_store.SettingsStore(
+    SETTINGS_FILE,
+    serialize_settings,
+    write_delay=SETTINGS_WRITE_DELAY_SECONDS,
+    journal=settings_journal.SettingsJournal(
+        SETTINGS_JOURNAL_FILE, max_entries=SETTINGS_JOURNAL_MAX_ENTRIES
+    ),
+)
 
 
-def get_is_game_in_settings(game_directory: pathlib.Path) -> bool:
-    is_game_already_in_list = False
-    for game_entry in get_game_entries_in_settings():
-        if os.path.normpath(game_entry["install_dir"]) == os.path.normpath(
-            str(game_directory)
-        ):
-            is_game_already_in_list = True
-            break
-    return is_game_already_in_list
+install_manifest_store = install_manifests.InstallManifestStore(INSTALL_MANIFESTS_DIR)
 
+display_name_resolver: display_names.DisplayNameResolver | None = None
 
-def remove_game_entry_by_game_dir(game_directory: pathlib.Path):
-    loaded_settings = get_settings()
-    games = loaded_settings.get("games", [])
 
-    target_path = game_directory.resolve(strict=False)
-    updated_games = []
+def save_settings(settings_dictionary: dict):
+    store.save(settings_dictionary)
 
-    for game in games:
-        install_dir = game.get("install_dir")
-        if install_dir is None:
-            updated_games.append(game)
-            continue
 
-        install_path = pathlib.Path(install_dir).resolve(strict=False)
-        if install_path != target_path:
-            updated_games.append(game)
+def flush_settings():
+    store.flush()
 
-    loaded_settings["games"] = updated_games
-    save_settings(loaded_settings)
 
+def write_settings_file_text(text: str):
+    store.write_file_text(text)
 
-has_inited_settings = False
 
+def log_settings_write_stats():
+    write_stats = store.write_stats
+    logger.log_message(
+        f"Settings writes: {write_stats.save_requests} requested, "
+        f"{write_stats.disk_writes} written, {write_stats.coalesced_writes} coalesced"
+    )
 
-def collect_all_scan_dirs():
-    all_game_dirs = []
 
-    # Steam and Epic Games
-    for dir_source in (
-        steam.get_all_steam_game_directories(),
-        epic.get_all_epic_games_game_directories(),
-    ):
-        for base_dir in dir_source:
-            all_game_dirs.extend(
-                unreal_engine.get_all_unreal_game_directories_in_directory_tree(
-                    str(base_dir)
-                )
-            )
-
-    # Custom game directories
-    for base_dir in get_settings().get("custom_game_directories", []):
-        all_game_dirs.extend(
-            unreal_engine.get_all_unreal_game_directories_in_directory_tree(
-                str(base_dir)
-            )
-        )
+def get_game_registry() -> game_registry.GameRegistry:
+    """
+    Read-only registry of the games in settings, rebuilt only when the settings change.
+    """
+    return store.get_derived(
+        "game_registry",
+        lambda loaded_settings: game_registry.GameRegistry(
+            loaded_settings.get("games", [])
+        ),
+    )
 
-    # Game directories already in settings
-    all_game_dirs.extend(get_game_dirs_in_settings())
 
-    return all_game_dirs
+def get_editable_game_registry(loaded_settings: dict) -> game_registry.GameRegistry:
+    """
+    Registry over the games of an editable settings copy, write it back with
+    set_games_from_game_registry before saving.
+    """
+    return game_registry.GameRegistry(loaded_settings.get("games", []))
 
 
-def collect_games_to_add():
-    all_game_dirs = collect_all_scan_dirs()
-    games_to_add = []
+def set_games_from_game_registry(
+    loaded_settings: dict, registry: game_registry.GameRegistry
+):
+    loaded_settings["games"] = registry.to_list()
 
-    for game_dir in all_game_dirs:
-        game_path = pathlib.Path(game_dir)
-        if unreal_engine.does_directory_contain_unreal_game(
-            game_path
-        ) or ue4ss.is_ue4ss_installed(game_path):
-            if not get_is_game_in_settings(game_path):
-                games_to_add.append(game_path)
 
-    return games_to_add
+def get_is_game_in_settings(game_directory: pathlib.Path) -> bool:
+    return game_directory in get_game_registry()
 
 
-def collect_games_to_remove():
-    games_to_remove = []
-    loaded_settings = get_settings()
-    all_games = loaded_settings.get("games", [])
+def remove_game_entry_by_game_dir(game_directory: pathlib.Path):
+    with edit_settings() as loaded_settings:
+        registry = get_editable_game_registry(loaded_settings)
+        registry.delete(game_directory)
+        set_games_from_game_registry(loaded_settings, registry)
 
-    for game in all_games:
-        install_dir = game.get("install_dir")
-        path = pathlib.Path(install_dir)
-        if not os.path.isdir(install_dir):
-            games_to_remove.append(path)
-        elif not ue4ss.is_ue4ss_installed(
-            path
-        ) and not unreal_engine.does_directory_contain_unreal_game(path):
-            games_to_remove.append(path)
 
-    return games_to_remove
+has_inited_settings = False
 
 
 def init_settings():
     global has_inited_settings
-    if not os.path.isfile(SETTINGS_FILE):
+    if not os.path.isfile(SETTINGS_FILE) and not store.recover_from_journal():
         make_settings_file()
 
+    # loading here replays the journal at startup if the settings file is unreadable
+    store.get()
+    move_inline_installed_files_to_install_manifests()
+    atexit.register(flush_settings)
+
     has_inited_settings = True
     logger.log_message(f"Settings initialized from {SETTINGS_FILE}")
 
 
-def get_settings() -> tomlkit.TOMLDocument:
-    if not os.path.isfile(SETTINGS_FILE):
-        logger.log_message(f"Settings file {SETTINGS_FILE} does not exist!")
-        raise FileNotFoundError("Missing settings file.")
+def move_inline_installed_files_to_install_manifests():
+    """
+    Older settings files stored each game's installed_files inline, this moves them
+    into install manifest sidecar files.
+    """
+    with edit_settings() as loaded_settings:
+        for game in loaded_settings.get("games", []):
+            if "installed_files" not in game:
+                continue
+            installed_files = game.pop("installed_files")
+            if installed_files and not install_manifest_store.has_manifest(
+                game["install_dir"]
+            ):
+                install_manifest_store.save(
+                    game["install_dir"],
+                    install_manifests.get_install_manifest_entries_from_paths(
+                        installed_files
+                    ),
+                )
 
-    with open(SETTINGS_FILE, "r") as f:
-        settings_data = tomlkit.load(f)
 
-    return settings_data
+def get_settings() -> settings_store.ReadOnlyDict:
+    return store.get()
+
+
+def edit_settings() -> contextlib.AbstractContextManager[dict]:
+    return store.edit()
+
+
+@contextlib.contextmanager
+def edit_game(
+    game_directory: str | pathlib.Path,
+) -> Iterator[data_structures.GameInfo | None]:
+    """
+    Transaction over a single game's info, all field changes made in the block are
+    committed together. Yields None if the game is not in settings.
+    """
+    with edit_settings() as loaded_settings:
+        registry = get_editable_game_registry(loaded_settings)
+        game_entry = registry.get(game_directory)
+        if game_entry is None:
+            yield None
+            return
+
+        game_info = game_info_dict_to_game_info_data_class(game_entry)
+        yield game_info
+        registry.upsert(game_info_data_class_to_game_info_dict(game_info))
+        set_games_from_game_registry(loaded_settings, registry)
 
 
 def get_game_dirs_in_settings() -> list[pathlib.Path]:
@@ -226,61 +294,93 @@ def get_game_dirs_in_settings() -> list[pathlib.Path]:
     return settings_game_dirs
 
 
-def get_install_dirs_to_game_titles() -> dict[str, str]:
+def get_display_name_resolver() -> display_names.DisplayNameResolver:
+    global display_name_resolver
+    if display_name_resolver is None:
+        display_name_resolver = display_names.make_display_name_resolver(
+            constants.GAME_PATHS_TO_DISPLAY_NAMES, DISPLAY_NAME_OVERRIDES_DIR
+        )
+    return display_name_resolver
+
+
+def get_game_display_name(install_dir: str, game_title: str) -> str:
+    return get_display_name_resolver().get_display_name(str(install_dir), game_title)
+
+
+def build_install_dirs_to_game_titles(loaded_settings) -> dict[str, str]:
+    resolver = get_display_name_resolver()
     install_dir_dict = {}
-    for game in get_game_entries_in_settings():
+    for game in loaded_settings.get("games", []):
         game_title = game.get("game_title")
         install_dir = game.get("install_dir")
 
         if game_title in constants.INVALID_GAMES:
             continue
 
-        matched = False
-        for game_key in constants.GAME_PATHS_TO_DISPLAY_NAMES.keys():
-            if game_key in install_dir:
-                display_name = constants.GAME_PATHS_TO_DISPLAY_NAMES[game_key]
-                install_dir_dict[install_dir] = display_name
-                matched = True
-                break
-
-        if not matched:
-            install_dir_dict[install_dir] = game_title
+        install_dir_dict[install_dir] = resolver.get_display_name(
+            install_dir, game_title
+        )
 
     return install_dir_dict
 
 
-def get_game_titles_to_install_dirs() -> dict[str, str]:
-    game_dict = {}
-    for game in get_game_entries_in_settings():
-        game_title = game.get("game_title")
-        install_dir = game.get("install_dir")
-
-        if game_title in constants.INVALID_GAMES:
-            continue
-
-        matched = False
-        for game_key in constants.GAME_PATHS_TO_DISPLAY_NAMES.keys():
-            if game_key in install_dir:
-                display_name = constants.GAME_PATHS_TO_DISPLAY_NAMES[game_key]
-                game_dict[display_name] = install_dir
-                matched = True
-                break
+def get_install_dirs_to_game_titles() -> dict[str, str]:
+    return dict(
+        store.get_derived(
+            "install_dirs_to_game_titles", build_install_dirs_to_game_titles
+        )
+    )
 
-        if not matched:
-            game_dict[game_title] = install_dir
 
+def get_game_titles_to_install_dirs() -> dict[str, str]:
+    game_dict = {}
+    for install_dir, display_name in store.get_derived(
+        "install_dirs_to_game_titles", build_install_dirs_to_game_titles
+    ).items():
+        game_dict[display_name] = install_dir
     return game_dict
 
 
 def get_game_info_instance_in_settings_from_game_directory(
     game_directory: str,
 ) -> data_structures.GameInfo | None:
-    for game in get_game_entries_in_settings():
-        if os.path.normpath(game.get("install_dir")) == os.path.normpath(
-            game_directory
-        ):
-            return game_info_dict_to_game_info_data_class(game)
-    return None
+    game = get_game_registry().get(game_directory)
+    if game is None:
+        return None
+    return game_info_dict_to_game_info_data_class(game)
+
+
+def get_game_exe_dir(game_directory: pathlib.Path) -> pathlib.Path:
+    """
+    Returns the game's Binaries/Win64 or WinGDK dir. The resolved dir is kept in the
+    game's settings entry and revalidated with a single stat, the tree is only searched
+    again when it no longer exists.
+    """
+    game = get_game_registry().get(game_directory)
+    cached_exe_dir = game.get("exe_dir") if game is not None else None
+    if cached_exe_dir and os.path.isdir(cached_exe_dir):
+        return pathlib.Path(cached_exe_dir)
+
+    from ue4ss_installer_gui import steam
+
+    exe_dir = steam.get_steam_exe_dir_for_game_dir(pathlib.Path(game_directory))
+    if exe_dir is None:
+        exe_dir = unreal_engine.find_main_exe_dir(pathlib.Path(game_directory))
+    if exe_dir is None:
+        return pathlib.Path("")
+
+    if game is not None:
+        with edit_settings() as loaded_settings:
+            registry = get_editable_game_registry(loaded_settings)
+            if game_directory in registry:
+                registry.upsert(
+                    {
+                        "install_dir": os.path.normpath(str(game_directory)),
+                        "exe_dir": os.path.normpath(str(exe_dir)),
+                    }
+                )
+                set_games_from_game_registry(loaded_settings, registry)
+    return exe_dir
 
 
 def game_info_data_class_to_game_info_dict(game_info: data_structures.GameInfo) -> dict:
@@ -296,7 +396,6 @@ def game_info_data_class_to_game_info_dict(game_info: data_structures.GameInfo)
         "show_pre_releases": game_info.show_pre_releases,
         "using_portable_version": game_info.using_portable_version,
         "using_keep_mods_and_settings": game_info.using_keep_mods_and_settings,
-        "installed_files": [str(path) for path in game_info.installed_files],
     }
 
 
@@ -315,52 +414,14 @@ def game_info_dict_to_game_info_data_class(game_dict: dict) -> data_structures.G
         show_pre_releases=game_dict["show_pre_releases"],
         using_portable_version=game_dict.get("using_portable_version", False),
         using_keep_mods_and_settings=game_dict["using_keep_mods_and_settings"],
-        installed_files=[
-            pathlib.Path(installed_file_path)
-            for installed_file_path in game_dict.get("installed_files", [])
-        ],
     )
 
 
 def save_game_info_to_settings_file(game_info: data_structures.GameInfo):
-    loaded_settings = get_settings()
-    games_list = loaded_settings.get("games", [])
-
-    install_dir_str = os.path.normpath(str(game_info.install_dir))
-    updated_game_dict = game_info_data_class_to_game_info_dict(game_info)
-
-    for game in games_list:
-        if os.path.normpath(game["install_dir"]) == install_dir_str:
-            game.update(updated_game_dict)
-            break
-    else:
-        games_list.append(updated_game_dict)
-
-    loaded_settings["games"] = games_list
-    save_settings(loaded_settings)
-
-
-def remove_game_entries_by_game_dirs(
-    game_directories: list[pathlib.Path], loaded_settings: dict
-) -> dict:
-    for game_directory in game_directories:
-        games = loaded_settings.get("games", [])
-
-        target_path = game_directory.resolve(strict=False)
-        updated_games = []
-
-        for game in games:
-            install_dir = os.path.normpath(game.get("install_dir"))
-            if install_dir is None:
-                updated_games.append(game)
-                continue
-
-            install_path = pathlib.Path(install_dir).resolve(strict=False)
-            if install_path != target_path:
-                updated_games.append(game)
-
-        loaded_settings["games"] = updated_games
-    return loaded_settings
+    with edit_settings() as loaded_settings:
+        registry = get_editable_game_registry(loaded_settings)
+        registry.upsert(game_info_data_class_to_game_info_dict(game_info))
+        set_games_from_game_registry(loaded_settings, registry)
 
 
 def get_settings_gui_section_from_settings():
@@ -386,11 +447,7 @@ def get_custom_game_directories():
 
 
 def save_global_font_scale(font_scale: float):
-    loaded_settings = get_settings()
-    gui_settings = loaded_settings.get("GUI", {})
-    gui_settings["global_font_scale"] = font_scale
-    loaded_settings["GUI"] = gui_settings
-    save_settings(loaded_settings)
+    update_gui_setting("global_font_scale", font_scale)
 
 
 def get_gui_setting(key, default=None):
@@ -405,6 +462,96 @@ def get_use_automatic_game_scanning_in_settings():
     return get_gui_setting("use_automatic_game_scanning", True)
 
 
+def get_scan_worker_count_from_settings() -> int:
+    worker_count = get_gui_setting("scan_worker_count", DEFAULT_SCAN_WORKER_COUNT)
+    try:
+        worker_count = int(worker_count)
+    except (TypeError, ValueError):
+        return DEFAULT_SCAN_WORKER_COUNT
+    return max(1, min(worker_count, MAX_SCAN_WORKER_COUNT))
+
+
+def get_slow_mount_scan_timeout_from_settings() -> float:
+    """
+    Seconds a scan waits on a root that sits on a network or removable mount.
+    """
+    timeout_seconds = get_gui_setting(
+        "slow_mount_scan_timeout_seconds", DEFAULT_SLOW_MOUNT_SCAN_TIMEOUT_SECONDS
+    )
+    try:
+        return max(0.1, float(timeout_seconds))
+    except (TypeError, ValueError):
+        return DEFAULT_SLOW_MOUNT_SCAN_TIMEOUT_SECONDS
+
+
+def get_release_cache_ttl_from_settings() -> float:
+    """
+    Seconds cached GitHub releases are used before they are revalidated.
+    """
+    ttl_seconds = get_gui_setting(
+        "release_cache_ttl_seconds", DEFAULT_RELEASE_CACHE_TTL_SECONDS
+    )
+    try:
+        return max(0.0, float(ttl_seconds))
+    except (TypeError, ValueError):
+        return DEFAULT_RELEASE_CACHE_TTL_SECONDS
+
+
+def get_github_api_url_from_settings() -> str:
+    """
+    Base URL for GitHub API requests, empty for api.github.com. Lets a local stand
+    in serving recorded responses replace GitHub.
+    """
+    return str(get_gui_setting("github_api_url", ""))
+
+
+def get_use_incremental_release_fetch_in_settings():
+    return get_gui_setting("use_incremental_release_fetch", False)
+
+
+def get_custom_scan_max_depth_from_settings() -> int:
+    max_depth = get_gui_setting(
+        "custom_scan_max_depth", unreal_engine.DEFAULT_DISCOVERY_MAX_DEPTH
+    )
+    try:
+        return max(0, int(max_depth))
+    except (TypeError, ValueError):
+        return unreal_engine.DEFAULT_DISCOVERY_MAX_DEPTH
+
+
+def get_custom_scan_entry_budget_from_settings() -> int:
+    """
+    Directory entries one custom game directory scan may list before it stops.
+    """
+    entry_budget = get_gui_setting(
+        "custom_scan_entry_budget", unreal_engine.DEFAULT_DISCOVERY_ENTRY_BUDGET
+    )
+    try:
+        return max(1, int(entry_budget))
+    except (TypeError, ValueError):
+        return unreal_engine.DEFAULT_DISCOVERY_ENTRY_BUDGET
+
+
+def get_custom_scan_ignore_patterns_from_settings() -> list[str]:
+    """
+    Built in ignore patterns plus the user's custom_scan_ignore_patterns.
+    """
+    extra_patterns = get_gui_setting("custom_scan_ignore_patterns", [])
+    if not isinstance(extra_patterns, list):
+        extra_patterns = []
+    return list(unreal_engine.DEFAULT_DISCOVERY_IGNORE_PATTERNS) + [
+        str(pattern) for pattern in extra_patterns
+    ]
+
+
+def get_custom_scan_discovery_options() -> dict:
+    return {
+        "max_depth": get_custom_scan_max_depth_from_settings(),
+        "entry_budget": get_custom_scan_entry_budget_from_settings(),
+        "ignore_patterns": get_custom_scan_ignore_patterns_from_settings(),
+    }
+
+
 def get_language_from_settings():
     return get_gui_setting("language", get_default_locale())
 
@@ -442,24 +589,18 @@ def get_system_font_path() -> str | None:
 
 
 def set_app_window_properties_in_settings(width, height, x_position, y_position):
-    loaded_settings = get_settings()
-    gui_settings = loaded_settings.get("GUI", {})
-
-    gui_settings["x"] = x_position
-    gui_settings["y"] = y_position
-    gui_settings["width"] = width
-    gui_settings["height"] = height
+    with edit_settings() as loaded_settings:
+        gui_settings = loaded_settings.setdefault("GUI", {})
 
-    loaded_settings["GUI"] = gui_settings
-    save_settings(loaded_settings)
+        gui_settings["x"] = x_position
+        gui_settings["y"] = y_position
+        gui_settings["width"] = width
+        gui_settings["height"] = height
 
 
 def update_gui_setting(key, value):
-    loaded_settings = get_settings()
-    gui_settings = loaded_settings.get("GUI", {})
-    gui_settings[key] = value
-    loaded_settings["GUI"] = gui_settings
-    save_settings(loaded_settings)
+    with edit_settings() as loaded_settings:
+        loaded_settings.setdefault("GUI", {})[key] = value
 
 
 def save_custom_font_path_to_settings(app_data):
@@ -474,6 +615,12 @@ def toggle_use_custom_font_in_settings_file(app_data):
     update_gui_setting("use_custom_font", app_data)
 
 
+def scan_worker_count_changed(sender, app_data, user_data):
+    update_gui_setting(
+        "scan_worker_count", max(1, min(int(app_data), MAX_SCAN_WORKER_COUNT))
+    )
+
+
 def toggle_use_automatic_game_scanning_in_settings_file(sender, app_data, user_data):
     update_gui_setting("use_automatic_game_scanning", app_data)
 
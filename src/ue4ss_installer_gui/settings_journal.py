@@ -0,0 +1,140 @@
+import os
+import json
+import time
+from typing import Optional
+
+from ue4ss_installer_gui import logger, file_io, game_registry
+
+
+def get_game_entry_key(game_entry: dict) -> str:
+    return game_registry.get_canonical_game_dir_key(game_entry.get("install_dir", ""))
+
+
+def get_settings_changes(previous: dict, current: dict) -> list[dict]:
+    """
+    Returns the journal operations that turn previous into current, games are diffed
+    per entry so a single game change does not journal the whole games array.
+    """
+    changes = []
+
+    for key, value in current.items():
+        if key == "games":
+            continue
+        if key not in previous or previous[key] != value:
+            changes.append({"op": "set", "key": key, "value": value})
+
+    for key in previous:
+        if key != "games" and key not in current:
+            changes.append({"op": "delete", "key": key})
+
+    previous_games = {
+        get_game_entry_key(game): game for game in previous.get("games", [])
+    }
+    current_games = {
+        get_game_entry_key(game): game for game in current.get("games", [])
+    }
+
+    for game_key, game in current_games.items():
+        if previous_games.get(game_key) != game:
+            changes.append({"op": "upsert_game", "value": game})
+
+    for game_key, game in previous_games.items():
+        if game_key not in current_games:
+            changes.append(
+                {"op": "delete_game", "install_dir": game.get("install_dir", "")}
+            )
+
+    return changes
+
+
+def apply_settings_change(settings_dictionary: dict, change: dict):
+    op = change.get("op")
+    if op == "set":
+        settings_dictionary[change["key"]] = change["value"]
+    elif op == "delete":
+        settings_dictionary.pop(change["key"], None)
+    elif op in ("upsert_game", "delete_game"):
+        games = settings_dictionary.setdefault("games", [])
+        if op == "upsert_game":
+            target_key = get_game_entry_key(change["value"])
+        else:
+            target_key = get_game_entry_key({"install_dir": change["install_dir"]})
+        for index, game in enumerate(games):
+            if get_game_entry_key(game) == target_key:
+                if op == "upsert_game":
+                    games[index] = change["value"]
+                else:
+                    del games[index]
+                break
+        else:
+            if op == "upsert_game":
+                games.append(change["value"])
+    else:
+        raise ValueError(f"Unknown settings journal operation: {op}")
+
+
+class SettingsJournal:
+    """
+    Append-only log of the last settings mutations, used to rebuild the settings file
+    if it can no longer be parsed. The journal starts with a full snapshot and is
+    compacted back into a single snapshot once it holds max_entries mutations.
+    """
+
+    def __init__(self, journal_file: str, max_entries: int = 64):
+        self.journal_file = journal_file
+        self.max_entries = max_entries
+        self._entry_count: Optional[int] = None
+
+    def _append_entry(self, entry: dict):
+        with open(self.journal_file, "a", encoding="utf-8") as file:
+            file.write(json.dumps(entry, default=str) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def compact(self, settings_dictionary: dict):
+        snapshot = {"op": "snapshot", "time": time.time(), "value": settings_dictionary}
+        file_io.write_file_atomically(
+            json.dumps(snapshot, default=str) + "\n", self.journal_file
+        )
+        self._entry_count = 0
+
+    def record(self, previous: Optional[dict], current: dict):
+        if (
+            previous is None
+            or self._entry_count is None
+            or self._entry_count >= self.max_entries
+        ):
+            self.compact(current)
+            return
+
+        changes = get_settings_changes(previous, current)
+        if not changes:
+            return
+
+        self._append_entry({"op": "changes", "time": time.time(), "value": changes})
+        self._entry_count += 1
+
+    def replay(self) -> Optional[dict]:
+        """
+        Rebuilds the settings from the journal, returns None if there is no usable snapshot.
+        """
+        if not os.path.isfile(self.journal_file):
+            return None
+
+        settings_dictionary = None
+        with open(self.journal_file, "r", encoding="utf-8") as file:
+            for line in file:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn final line from a crash mid-append, everything before it is valid
+                    logger.log_message("Skipping unreadable settings journal entry")
+                    break
+
+                if entry.get("op") == "snapshot":
+                    settings_dictionary = entry["value"]
+                elif settings_dictionary is not None:
+                    for change in entry.get("value", []):
+                        apply_settings_change(settings_dictionary, change)
+
+        return settings_dictionary
@@ -0,0 +1,318 @@
+import os
+import copy
+import threading
+import contextlib
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Optional, Tuple
+from collections.abc import Mapping, Sequence
+
+import tomlkit
+import tomlkit.exceptions
+
+try:
+    import tomllib
+except ModuleNotFoundError:
+    import tomli as tomllib
+
+from ue4ss_installer_gui import logger, file_io, settings_journal
+
+
+class ReadOnlyDict(Mapping):
+    """
+    Read-only view over a cached settings table, nested tables and arrays are wrapped on access.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: dict):
+        self._data = data
+
+    def __getitem__(self, key: str) -> Any:
+        return freeze(self._data[key])
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._data)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyDict({self._data!r})"
+
+    def to_dict(self) -> dict:
+        return copy.deepcopy(self._data)
+
+
+class ReadOnlyList(Sequence):
+    """
+    Read-only view over a cached settings array, nested tables and arrays are wrapped on access.
+    """
+
+    __slots__ = ("_data",)
+
+    def __init__(self, data: list):
+        self._data = data
+
+    def __getitem__(self, index):
+        return freeze(self._data[index])
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ReadOnlyList):
+            other = other._data
+        return self._data == other
+
+    def __repr__(self) -> str:
+        return f"ReadOnlyList({self._data!r})"
+
+    def to_list(self) -> list:
+        return copy.deepcopy(self._data)
+
+
+def freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return ReadOnlyDict(value)
+    if isinstance(value, list):
+        return ReadOnlyList(value)
+    return value
+
+
+def to_plain(value: Any) -> Any:
+    """
+    Converts read-only views, tomlkit containers and items into plain python values.
+    """
+    if isinstance(value, ReadOnlyDict):
+        return value.to_dict()
+    if isinstance(value, ReadOnlyList):
+        return value.to_list()
+    if isinstance(value, Mapping):
+        return {str(key): to_plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_plain(item) for item in value]
+    if hasattr(value, "unwrap"):
+        return value.unwrap()
+    return value
+
+
+def get_file_stamp(file_path: str) -> Optional[Tuple[int, int]]:
+    try:
+        stat_result = os.stat(file_path)
+    except OSError:
+        return None
+    return (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+@dataclass
+class SettingsWriteStats:
+    save_requests: int = 0
+    disk_writes: int = 0
+
+    @property
+    def coalesced_writes(self) -> int:
+        return self.save_requests - self.disk_writes
+
+
+class SettingsStore:
+    """
+    Keeps a parsed copy of the settings file in memory, reparsing it only when the
+    file's mtime or size changes (for example after editing it in the text editor).
+
+    Reads use the stdlib toml parser, the slower style preserving tomlkit document is
+    only parsed when a write needs it, so hand edits and comments survive saves.
+
+    Saves are write-behind, every save made within write_delay seconds of the first
+    pending one is coalesced into a single write of the settings file. Writes are
+    atomic and journaled first, so a settings file that fails to parse can be rebuilt.
+    """
+
+    def __init__(
+        self,
+        settings_file: str,
+        serializer: Callable[[dict, Optional[tomlkit.TOMLDocument]], str],
+        write_delay: float = 0.5,
+        journal: Optional[settings_journal.SettingsJournal] = None,
+    ):
+        self.settings_file = settings_file
+        self.serializer = serializer
+        self.write_delay = write_delay
+        self.journal = journal
+        self.lock = threading.RLock()
+        self.load_count = 0
+        self.write_stats = SettingsWriteStats()
+        self._data: Optional[dict] = None
+        self._persisted_data: Optional[dict] = None
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._document: Optional[tomlkit.TOMLDocument] = None
+        self._document_stamp: Optional[Tuple[int, int]] = None
+        self._is_dirty = False
+        self._write_timer: Optional[threading.Timer] = None
+        self._derived_values: dict[str, Any] = {}
+        self._derived_values_source: Optional[dict] = None
+
+    def _get_current_data(self) -> dict:
+        if self._is_dirty and self._data is not None:
+            return self._data
+
+        stamp = get_file_stamp(self.settings_file)
+        if stamp is None:
+            logger.log_message(f"Settings file {self.settings_file} does not exist!")
+            raise FileNotFoundError("Missing settings file.")
+
+        if self._data is None or stamp != self._stamp:
+            try:
+                with open(self.settings_file, "rb") as f:
+                    self._data = tomllib.load(f)
+            except (tomllib.TOMLDecodeError, UnicodeDecodeError) as e:
+                logger.log_message(f"Failed to parse {self.settings_file}: {e}")
+                if not self.recover_from_journal():
+                    raise
+                return self._data  # type: ignore
+            self._persisted_data = self._data
+            self._stamp = stamp
+            self.load_count += 1
+
+        return self._data
+
+    def recover_from_journal(self) -> bool:
+        """
+        Replaces the settings file with the state rebuilt from the journal, the
+        unreadable file is kept next to it with a .corrupt suffix.
+        """
+        if self.journal is None:
+            return False
+
+        try:
+            recovered_data = self.journal.replay()
+        except (OSError, ValueError, KeyError) as e:
+            logger.log_message(f"Failed to replay settings journal: {e}")
+            return False
+        if recovered_data is None:
+            return False
+
+        with self.lock:
+            if os.path.isfile(self.settings_file):
+                os.replace(self.settings_file, f"{self.settings_file}.corrupt")
+            file_io.write_file_atomically(
+                self.serializer(recovered_data, None), self.settings_file
+            )
+            self._data = recovered_data
+            self._persisted_data = recovered_data
+            self._stamp = get_file_stamp(self.settings_file)
+            self._is_dirty = False
+
+        logger.log_message(
+            f"Recovered settings from journal {self.journal.journal_file}"
+        )
+        return True
+
+    def _get_document(self) -> Optional[tomlkit.TOMLDocument]:
+        """
+        The tomlkit document of the settings file on disk, parsed lazily for writes.
+        """
+        stamp = get_file_stamp(self.settings_file)
+        if stamp is None:
+            return None
+        if self._document is None or stamp != self._document_stamp:
+            try:
+                with open(self.settings_file, "r", encoding="utf-8") as f:
+                    self._document = tomlkit.load(f)
+            except (tomlkit.exceptions.ParseError, UnicodeDecodeError):
+                return None
+            self._document_stamp = stamp
+        return self._document
+
+    def get(self) -> ReadOnlyDict:
+        with self.lock:
+            return ReadOnlyDict(self._get_current_data())
+
+    def get_derived(self, name: str, build: Callable[[ReadOnlyDict], Any]) -> Any:
+        """
+        Returns build(settings), memoized until the cached settings data changes.
+        """
+        with self.lock:
+            data = self._get_current_data()
+            if data is not self._derived_values_source:
+                self._derived_values = {}
+                self._derived_values_source = data
+            if name not in self._derived_values:
+                self._derived_values[name] = build(ReadOnlyDict(data))
+            return self._derived_values[name]
+
+    @contextlib.contextmanager
+    def edit(self) -> Iterator[dict]:
+        """
+        Transaction over an editable copy of the settings, the copy is saved when the
+        block exits without an exception and something changed. The store lock is held
+        for the whole block, so concurrent edits from other threads cannot be lost.
+        """
+        with self.lock:
+            original_data = self._get_current_data()
+            settings_dictionary = copy.deepcopy(original_data)
+            yield settings_dictionary
+            if settings_dictionary != original_data:
+                self.save(settings_dictionary)
+
+    def save(self, settings_dictionary: dict):
+        with self.lock:
+            self._data = to_plain(settings_dictionary)
+            self._is_dirty = True
+            self.write_stats.save_requests += 1
+            if self._write_timer is None:
+                self._write_timer = threading.Timer(self.write_delay, self.flush)
+                self._write_timer.daemon = True
+                self._write_timer.start()
+
+    def flush(self) -> bool:
+        """
+        Writes pending changes to the settings file, returns whether anything was written.
+        """
+        with self.lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+
+            if not self._is_dirty or self._data is None:
+                return False
+
+            document = self._get_document()
+            toml_str = self.serializer(self._data, document)
+            if self.journal is not None:
+                self.journal.record(self._persisted_data, self._data)
+            file_io.write_file_atomically(toml_str, self.settings_file)
+
+            self._persisted_data = self._data
+            self._stamp = get_file_stamp(self.settings_file)
+            # the serializer updated the document in place, so it matches the new file
+            self._document_stamp = self._stamp if document is not None else None
+            self._is_dirty = False
+            self.write_stats.disk_writes += 1
+
+        logger.log_message(f"Settings saved to {self.settings_file}")
+        return True
+
+    def has_pending_writes(self) -> bool:
+        return self._is_dirty
+
+    def invalidate(self):
+        with self.lock:
+            self._data = None
+            self._persisted_data = None
+            self._stamp = None
+
+    def write_file_text(self, text: str):
+        """
+        Replaces the settings file with hand edited text. Pending saves are dropped
+        under the store lock, so a queued write-behind flush of the older cached
+        settings cannot overwrite the new file afterwards.
+        """
+        with self.lock:
+            if self._write_timer is not None:
+                self._write_timer.cancel()
+                self._write_timer = None
+            self._is_dirty = False
+            file_io.write_file_atomically(text, self.settings_file)
+            self.invalidate()
+            self._document = None
+            self._document_stamp = None
@@ -1,118 +1,427 @@
 import os
-import re
+import glob
+import functools
 import pathlib
+from dataclasses import dataclass
+from typing import Optional
 
-from ue4ss_installer_gui import file_io, settings
+from ue4ss_installer_gui import (
+    file_io,
+    settings,
+    logger,
+    vdf,
+    game_registry,
+    steam_appinfo,
+    unreal_engine,
+    mounts,
+)
+
+
+# StateFlags bit Valve sets once every depot of the app is downloaded and installed
+STEAM_APP_STATE_FULLY_INSTALLED = 4
+
+
+@dataclass
+class SteamAppManifest:
+    app_id: str
+    name: str
+    install_dir_name: str
+    state_flags: int
+    library_dir: pathlib.Path
+
+    @property
+    def is_fully_installed(self) -> bool:
+        return bool(self.state_flags & STEAM_APP_STATE_FULLY_INSTALLED)
+
+    @property
+    def game_dir(self) -> pathlib.Path:
+        return self.library_dir / "steamapps" / "common" / self.install_dir_name
+
+
+@dataclass
+class SteamShortcut:
+    app_name: str
+    exe_path: pathlib.Path
+    start_dir: str
+
+
+# installed apps from the last discovery pass, keyed by canonical game dir
+cached_steam_app_manifests: dict[str, SteamAppManifest] = {}
+
+# appinfo.vdf entries of those apps, keyed by app id
+cached_steam_app_infos: dict[str, steam_appinfo.SteamAppInfo] = {}
+
+# non-Steam game shortcuts from the last discovery pass, keyed by canonical game dir
+cached_steam_shortcuts: dict[str, SteamShortcut] = {}
+
+steam_appinfo_index = steam_appinfo.SteamAppInfoIndex(settings.STEAM_APPINFO_INDEX_FILE)
 
 
 def get_windows_steam_registry_paths() -> list[pathlib.Path]:
-    """Get Steam library paths from Windows Registry."""
+    """Get the Steam install dir from the Windows Registry."""
     import winreg
 
     steam_dirs = []
     try:
         with winreg.OpenKey(winreg.HKEY_CURRENT_USER, r"Software\Valve\Steam") as key:
             steam_path, _ = winreg.QueryValueEx(key, "SteamPath")
-            steamapps_common = pathlib.Path(steam_path) / "steamapps" / "common"
-            if steamapps_common.is_dir():
-                for game_dir in steamapps_common.iterdir():
-                    if game_dir.is_dir():
-                        steam_dirs.append(game_dir)
+            steam_dirs.append(pathlib.Path(os.path.normpath(steam_path)))
     except Exception:
         pass
     return steam_dirs
 
 
 def get_windows_default_steam_paths() -> list[pathlib.Path]:
-    """Get Steam library paths from default drive locations."""
+    """Get Steam install and library dirs from default drive locations."""
     steam_dirs = []
-
-    # most steam installs on c drive, but not always
-    # games installed on same drive as steam vs not have different pathing
-    # drive check and break here are meant to minimize drive reading
-
     for drive_letter in file_io.get_all_drive_letter_paths():
-        if drive_letter.startswith("C"):
-            steam_common_paths = [
-                os.path.normpath(
-                    f"{drive_letter}Program Files (x86)/Steam/steamapps/common"
-                ),
-                os.path.normpath(f"{drive_letter}SteamLibrary/steamapps/common"),
-            ]
-        else:
-            steam_common_paths = [
-                os.path.normpath(f"{drive_letter}SteamLibrary/steamapps/common"),
-                os.path.normpath(
-                    f"{drive_letter}Program Files (x86)/Steam/steamapps/common"
-                ),
-            ]
-
-        for steam_directory in steam_common_paths:
-            if os.path.isdir(steam_directory):
-                for game_dir in pathlib.Path(steam_directory).iterdir():
-                    if game_dir.is_dir():
-                        steam_dirs.append(game_dir)
-                break
-
+        steam_dirs.append(
+            pathlib.Path(os.path.normpath(f"{drive_letter}Program Files (x86)/Steam"))
+        )
+        steam_dirs.append(pathlib.Path(os.path.normpath(f"{drive_letter}SteamLibrary")))
     return steam_dirs
 
 
 def get_linux_default_steam_paths() -> list[pathlib.Path]:
-    """Get Steam library paths from default Linux locations."""
-    steam_dirs = []
-    steamapps_dirs = [
-        os.path.expanduser("~/.steam/steam/steamapps"),
-        os.path.expanduser("~/.local/share/Steam/steamapps"),
-        os.path.expanduser("~/Steam/steamapps"),
-        os.path.expanduser("~/snap/steam/common/.steam/steam/steamapps"),
-        os.path.expanduser("~/snap/steam/current/.steam/steam/steamapps"),
+    """Get Steam install dirs from default Linux locations."""
+    return [
+        pathlib.Path(os.path.expanduser(steam_dir))
+        for steam_dir in (
+            "~/.steam/steam",
+            "~/.local/share/Steam",
+            "~/Steam",
+            "~/snap/steam/common/.steam/steam",
+            "~/snap/steam/current/.steam/steam",
+        )
     ]
-    for steamapps in steamapps_dirs:
-        common_path = pathlib.Path(steamapps) / "common"
-        if common_path.is_dir():
-            for game_dir in common_path.iterdir():
-                if game_dir.is_dir():
-                    steam_dirs.append(game_dir)
-    return steam_dirs
 
 
-def get_linux_libraryfolders_paths() -> list[pathlib.Path]:
-    """Get Steam library paths from Linux libraryfolders.vdf files."""
-    steam_dirs = []
-    steamapps_dirs = [
-        os.path.expanduser("~/.steam/steam/steamapps"),
-        os.path.expanduser("~/.local/share/Steam/steamapps"),
-        os.path.expanduser("~/Steam/steamapps"),
-        os.path.expanduser("~/snap/steam/common/.steam/steam/steamapps"),
-        os.path.expanduser("~/snap/steam/current/.steam/steam/steamapps"),
-    ]
-    for steamapps in steamapps_dirs:
-        vdf_path = pathlib.Path(steamapps) / "libraryfolders.vdf"
-        if vdf_path.exists():
-            try:
-                with open(vdf_path, "r", encoding="utf-8", errors="ignore") as f:
-                    content = f.read()
-                matches = re.findall(r'"\d+"\s*"\s*(.*?)\s*"', content)
-                for match in matches:
-                    other_common = pathlib.Path(match.strip()) / "steamapps/common"
-                    if other_common.is_dir():
-                        for game_dir in other_common.iterdir():
-                            if game_dir.is_dir():
-                                steam_dirs.append(game_dir)
-            except Exception:
-                pass
-    return steam_dirs
+def read_vdf_file(vdf_path: pathlib.Path) -> Optional[dict]:
+    try:
+        with open(vdf_path, "r", encoding="utf-8", errors="replace") as file:
+            return vdf.parse_vdf_text(file.read())
+    except (OSError, vdf.VDFParseError) as e:
+        logger.log_message(f"Skipping unreadable Steam file {vdf_path}: {e}")
+        return None
 
 
-def get_all_steam_game_directories() -> list[pathlib.Path]:
-    """Combine all possible Steam game directories."""
-    steam_dirs = []
+def get_libraryfolders_library_dirs(steam_dir: pathlib.Path) -> list[pathlib.Path]:
+    """
+    Library dirs listed in libraryfolders.vdf, both the current format where each entry
+    is a block with a "path" key and the old one where the value is the path itself.
+    """
+    library_dirs = []
+    for vdf_path in (
+        steam_dir / "steamapps" / "libraryfolders.vdf",
+        steam_dir / "config" / "libraryfolders.vdf",
+    ):
+        if not vdf_path.is_file():
+            continue
+        parsed_vdf = read_vdf_file(vdf_path)
+        if parsed_vdf is None:
+            continue
+        library_folders = vdf.get_case_insensitive(parsed_vdf, "libraryfolders", {})
+        for key, value in library_folders.items():
+            if not key.isdigit():
+                continue
+            if isinstance(value, dict):
+                library_path = vdf.get_case_insensitive(value, "path")
+            else:
+                library_path = value
+            if library_path:
+                library_dirs.append(pathlib.Path(os.path.normpath(library_path)))
+    return library_dirs
+
 
+def get_steam_install_dirs() -> list[pathlib.Path]:
     if settings.is_windows():
-        steam_dirs.extend(get_windows_steam_registry_paths())
-        steam_dirs.extend(get_windows_default_steam_paths())
-    else:
-        steam_dirs.extend(get_linux_default_steam_paths())
-        steam_dirs.extend(get_linux_libraryfolders_paths())
+        return get_windows_steam_registry_paths() + get_windows_default_steam_paths()
+    return get_linux_default_steam_paths()
+
+
+def get_all_steam_library_dirs(
+    runner: Optional[mounts.MountAwareRunner] = None,
+) -> list[pathlib.Path]:
+    """
+    Every Steam library dir, each Steam install is a library itself and lists the
+    others in libraryfolders.vdf. Symlinked duplicates like ~/.steam/steam are dropped,
+    as are libraries on mounts that do not answer within the runner's deadline.
+    """
+    library_dirs = []
+    seen_library_keys = set()
+
+    def add_library_dir(library_dir: pathlib.Path):
+        def get_library_key() -> Optional[str]:
+            if not (library_dir / "steamapps").is_dir():
+                return None
+            return game_registry.get_canonical_game_dir_key(
+                os.path.realpath(library_dir)
+            )
+
+        if runner is None:
+            library_key = get_library_key()
+        else:
+            library_key = runner.call(library_dir, get_library_key, None)
+        if library_key is None or library_key in seen_library_keys:
+            return
+        seen_library_keys.add(library_key)
+        library_dirs.append(library_dir)
+
+    for steam_dir in get_steam_install_dirs():
+        add_library_dir(steam_dir)
+        for library_dir in get_libraryfolders_library_dirs(steam_dir):
+            add_library_dir(library_dir)
+    return library_dirs
+
+
+def read_steam_app_manifest(
+    manifest_path: str, library_dir: pathlib.Path
+) -> Optional[SteamAppManifest]:
+    parsed_manifest = read_vdf_file(pathlib.Path(manifest_path))
+    if parsed_manifest is None:
+        return None
+    app_state = vdf.get_case_insensitive(parsed_manifest, "AppState")
+    if not isinstance(app_state, dict):
+        return None
+
+    install_dir_name = vdf.get_case_insensitive(app_state, "installdir")
+    if not install_dir_name:
+        return None
+    try:
+        state_flags = int(vdf.get_case_insensitive(app_state, "StateFlags", "0"))
+    except ValueError:
+        state_flags = 0
 
+    return SteamAppManifest(
+        app_id=vdf.get_case_insensitive(app_state, "appid", ""),
+        name=vdf.get_case_insensitive(app_state, "name", ""),
+        install_dir_name=install_dir_name,
+        state_flags=state_flags,
+        library_dir=library_dir,
+    )
+
+
+def get_steam_app_manifests(library_dir: pathlib.Path) -> list[SteamAppManifest]:
+    manifest_paths = sorted(
+        glob.glob(os.path.join(library_dir, "steamapps", "appmanifest_*.acf"))
+    )
+    app_manifests = []
+    for manifest_path in manifest_paths:
+        app_manifest = read_steam_app_manifest(manifest_path, library_dir)
+        if app_manifest is not None:
+            app_manifests.append(app_manifest)
+    return app_manifests
+
+
+def get_library_common_dirs(library_dir: pathlib.Path) -> list[pathlib.Path]:
+    """Every folder in steamapps/common, for libraries without app manifests."""
+    common_dir = library_dir / "steamapps" / "common"
+    if not common_dir.is_dir():
+        return []
+    return [game_dir for game_dir in common_dir.iterdir() if game_dir.is_dir()]
+
+
+def get_all_steam_game_directories(
+    runner: Optional[mounts.MountAwareRunner] = None,
+) -> list[pathlib.Path]:
+    """
+    Game dirs of every fully installed Steam app. Uninstalled and partially downloaded
+    apps are skipped, libraries without any app manifests fall back to listing
+    steamapps/common.
+    """
+    global cached_steam_app_manifests, cached_steam_app_infos
+    steam_app_manifests = {}
+    steam_dirs = []
+
+    def get_library_game_dirs(library_dir: pathlib.Path):
+        app_manifests = get_steam_app_manifests(library_dir)
+        if not app_manifests:
+            return app_manifests, get_library_common_dirs(library_dir)
+        return app_manifests, []
+
+    for library_dir in get_all_steam_library_dirs(runner):
+        if runner is None:
+            app_manifests, common_dirs = get_library_game_dirs(library_dir)
+        else:
+            app_manifests, common_dirs = runner.call(
+                library_dir,
+                functools.partial(get_library_game_dirs, library_dir),
+                ([], []),
+            )
+        steam_dirs.extend(common_dirs)
+
+        for app_manifest in app_manifests:
+            if not app_manifest.is_fully_installed:
+                continue
+            steam_app_manifests[
+                game_registry.get_canonical_game_dir_key(app_manifest.game_dir)
+            ] = app_manifest
+            steam_dirs.append(app_manifest.game_dir)
+
+    cached_steam_app_manifests = steam_app_manifests
+    cached_steam_app_infos = get_steam_app_infos(
+        app_manifest.app_id for app_manifest in steam_app_manifests.values()
+    )
     return steam_dirs
+
+
+def get_steam_appinfo_path() -> Optional[str]:
+    for steam_dir in get_steam_install_dirs():
+        appinfo_path = steam_dir / "appcache" / "appinfo.vdf"
+        if appinfo_path.is_file():
+            return str(appinfo_path)
+    return None
+
+
+def get_steam_app_infos(app_ids) -> dict[str, steam_appinfo.SteamAppInfo]:
+    """
+    Looks app ids up in appinfo.vdf through the persistent index, one streaming pass
+    over the file covers every app id that is not indexed yet.
+    """
+    appinfo_path = get_steam_appinfo_path()
+    if appinfo_path is None:
+        return {}
+    return steam_appinfo_index.get_app_infos(appinfo_path, app_ids)
+
+
+def get_steam_app_manifest_for_game_dir(
+    game_directory: pathlib.Path,
+) -> Optional[SteamAppManifest]:
+    """
+    Looks up the app manifest found by the last get_all_steam_game_directories call.
+    """
+    return cached_steam_app_manifests.get(
+        game_registry.get_canonical_game_dir_key(game_directory)
+    )
+
+
+def get_steam_game_title_for_game_dir(game_directory: pathlib.Path) -> Optional[str]:
+    app_manifest = get_steam_app_manifest_for_game_dir(game_directory)
+    if app_manifest is None:
+        return None
+    app_info = cached_steam_app_infos.get(app_manifest.app_id)
+    if app_manifest.name:
+        return app_manifest.name
+    if app_info is not None and app_info.name:
+        return app_info.name
+    return app_manifest.install_dir_name
+
+
+def get_steam_exe_dir_for_game_dir(
+    game_directory: pathlib.Path,
+) -> Optional[pathlib.Path]:
+    """
+    The dir of the app's Windows launch executable when it is a Binaries/Win64 or
+    WinGDK dir, so the exe dir is known without searching the game tree.
+    """
+    app_manifest = get_steam_app_manifest_for_game_dir(game_directory)
+    if app_manifest is None:
+        return None
+    app_info = cached_steam_app_infos.get(app_manifest.app_id)
+    if app_info is None or not app_info.launch_executable:
+        return None
+    exe_dir = pathlib.Path(game_directory) / os.path.dirname(app_info.launch_executable)
+    if exe_dir.name.lower() not in (
+        name.lower() for name in unreal_engine.MAIN_EXE_DIR_NAMES
+    ):
+        return None
+    if not exe_dir.is_dir():
+        return None
+    return exe_dir
+
+
+def read_steam_shortcuts(shortcuts_path: str) -> list[SteamShortcut]:
+    """
+    Reads a userdata/<user>/config/shortcuts.vdf, binary KeyValues holding one block
+    per non-Steam game with its name, quoted exe path and start dir.
+    """
+    try:
+        with open(shortcuts_path, "rb") as file:
+            data = file.read()
+        values, _ = steam_appinfo.BinaryKeyValuesReader(data, None).read_map(0)
+    except (OSError, ValueError, IndexError) as e:
+        logger.log_message(f"Skipping unreadable Steam file {shortcuts_path}: {e}")
+        return []
+
+    shortcuts = []
+    for shortcut in vdf.get_case_insensitive(values, "shortcuts", {}).values():
+        if not isinstance(shortcut, dict):
+            continue
+        exe_path = vdf.get_case_insensitive(shortcut, "Exe", "").strip().strip('"')
+        if not exe_path:
+            continue
+        shortcuts.append(
+            SteamShortcut(
+                app_name=vdf.get_case_insensitive(shortcut, "AppName", ""),
+                exe_path=pathlib.Path(os.path.normpath(exe_path)),
+                start_dir=vdf.get_case_insensitive(shortcut, "StartDir", "").strip('"'),
+            )
+        )
+    return shortcuts
+
+
+def get_all_steam_shortcuts_files() -> list[str]:
+    shortcuts_files = []
+    for steam_dir in get_steam_install_dirs():
+        shortcuts_files.extend(
+            sorted(
+                glob.glob(
+                    os.path.join(steam_dir, "userdata", "*", "config", "shortcuts.vdf")
+                )
+            )
+        )
+    return shortcuts_files
+
+
+def get_game_dir_from_shortcut_exe(exe_path: pathlib.Path) -> pathlib.Path:
+    """
+    For <game>/<project>/Binaries/Win64/<project>.exe returns <game>, for the launcher
+    exe in the game root returns its dir.
+    """
+    exe_dir = exe_path.parent
+    exe_dir_names = [name.lower() for name in unreal_engine.MAIN_EXE_DIR_NAMES]
+    if exe_dir.name.lower() in exe_dir_names and exe_dir.parent.name.lower() == (
+        "binaries"
+    ):
+        return exe_dir.parent.parent.parent
+    return exe_dir
+
+
+def get_all_steam_shortcut_game_directories(
+    runner: Optional[mounts.MountAwareRunner] = None,
+) -> list[pathlib.Path]:
+    """
+    Game dirs of non-Steam games added to Steam as shortcuts, only dirs that exist.
+    Dirs on mounts that do not answer within the runner's deadline are left out.
+    """
+    global cached_steam_shortcuts
+    steam_shortcuts = {}
+    shortcut_game_dirs = []
+    for shortcuts_file in get_all_steam_shortcuts_files():
+        for shortcut in read_steam_shortcuts(shortcuts_file):
+            game_dir = get_game_dir_from_shortcut_exe(shortcut.exe_path)
+            game_dir_key = game_registry.get_canonical_game_dir_key(game_dir)
+            if game_dir_key in steam_shortcuts:
+                continue
+            if runner is None:
+                is_game_dir = game_dir.is_dir()
+            else:
+                is_game_dir = runner.call(game_dir, game_dir.is_dir, False)
+            if not is_game_dir:
+                continue
+            steam_shortcuts[game_dir_key] = shortcut
+            shortcut_game_dirs.append(game_dir)
+
+    cached_steam_shortcuts = steam_shortcuts
+    return shortcut_game_dirs
+
+
+def get_steam_shortcut_name_for_game_dir(
+    game_directory: pathlib.Path,
+) -> Optional[str]:
+    shortcut = cached_steam_shortcuts.get(
+        game_registry.get_canonical_game_dir_key(game_directory)
+    )
+    if shortcut is None or not shortcut.app_name:
+        return None
+    return shortcut.app_name
@@ -0,0 +1,273 @@
+import os
+import mmap
+import json
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from ue4ss_installer_gui import logger, file_io
+
+
+APPINFO_MAGIC_V27 = 0x07564427
+APPINFO_MAGIC_V28 = 0x07564428
+APPINFO_MAGIC_V29 = 0x07564429
+
+# binary KeyValues value types
+KV_TYPE_MAP = 0x00
+KV_TYPE_STRING = 0x01
+KV_TYPE_INT32 = 0x02
+KV_TYPE_FLOAT32 = 0x03
+KV_TYPE_POINTER = 0x04
+KV_TYPE_WIDE_STRING = 0x05
+KV_TYPE_COLOR = 0x06
+KV_TYPE_UINT64 = 0x07
+KV_TYPE_MAP_END = 0x08
+KV_TYPE_INT64 = 0x0A
+KV_TYPE_MAP_END_ALT = 0x0B
+
+KV_FIXED_VALUE_SIZES = {
+    KV_TYPE_INT32: 4,
+    KV_TYPE_FLOAT32: 4,
+    KV_TYPE_POINTER: 4,
+    KV_TYPE_COLOR: 4,
+    KV_TYPE_UINT64: 8,
+    KV_TYPE_INT64: 8,
+}
+
+APPINFO_INDEX_FORMAT_VERSION = 1
+
+UINT32 = struct.Struct("<I")
+INT64 = struct.Struct("<q")
+
+
+class AppInfoParseError(ValueError):
+    pass
+
+
+@dataclass
+class SteamAppInfo:
+    app_id: str
+    name: str
+    install_dir_name: str
+    launch_executable: str
+
+
+class BinaryKeyValuesReader:
+    """
+    Reads the binary KeyValues blob of one appinfo.vdf entry. Only the string values
+    are decoded, numbers are skipped as the index has no use for them.
+    """
+
+    def __init__(self, buffer, key_table: Optional[list[str]]):
+        self.buffer = buffer
+        self.key_table = key_table
+
+    def read_c_string(self, offset: int) -> tuple[str, int]:
+        end = self.buffer.find(b"\x00", offset)
+        if end == -1:
+            raise AppInfoParseError("Unterminated string in appinfo.vdf")
+        return self.buffer[offset:end].decode("utf-8", errors="replace"), end + 1
+
+    def read_key(self, offset: int) -> tuple[str, int]:
+        if self.key_table is None:
+            return self.read_c_string(offset)
+        (key_index,) = UINT32.unpack_from(self.buffer, offset)
+        if key_index >= len(self.key_table):
+            raise AppInfoParseError("Key index out of range in appinfo.vdf")
+        return self.key_table[key_index], offset + 4
+
+    def read_map(self, offset: int) -> tuple[dict, int]:
+        values: dict = {}
+        while True:
+            value_type = self.buffer[offset]
+            offset += 1
+            if value_type in (KV_TYPE_MAP_END, KV_TYPE_MAP_END_ALT):
+                return values, offset
+
+            key, offset = self.read_key(offset)
+            if value_type == KV_TYPE_MAP:
+                values[key], offset = self.read_map(offset)
+            elif value_type == KV_TYPE_STRING:
+                values[key], offset = self.read_c_string(offset)
+            elif value_type == KV_TYPE_WIDE_STRING:
+                end = offset
+                while self.buffer[end : end + 2] != b"\x00\x00":
+                    end += 2
+                    if end >= len(self.buffer):
+                        raise AppInfoParseError(
+                            "Unterminated wide string in appinfo.vdf"
+                        )
+                values[key] = self.buffer[offset:end].decode(
+                    "utf-16-le", errors="replace"
+                )
+                offset = end + 2
+            elif value_type in KV_FIXED_VALUE_SIZES:
+                offset += KV_FIXED_VALUE_SIZES[value_type]
+            else:
+                raise AppInfoParseError(
+                    f"Unknown value type {value_type} in appinfo.vdf"
+                )
+
+
+def read_key_table(buffer, string_table_offset: int) -> list[str]:
+    (string_count,) = UINT32.unpack_from(buffer, string_table_offset)
+    reader = BinaryKeyValuesReader(buffer, None)
+    offset = string_table_offset + 4
+    key_table = []
+    for _ in range(string_count):
+        key, offset = reader.read_c_string(offset)
+        key_table.append(key)
+    return key_table
+
+
+def get_launch_executable(app_config: dict) -> str:
+    """
+    The first Windows launch option's executable, relative to the install dir.
+    """
+    for launch_option in app_config.get("launch", {}).values():
+        if not isinstance(launch_option, dict):
+            continue
+        executable = launch_option.get("executable", "")
+        os_list = launch_option.get("config", {}).get("oslist", "windows")
+        if executable.lower().endswith(".exe") and "windows" in os_list:
+            return executable.replace("\\", "/")
+    return ""
+
+
+def read_app_infos(
+    appinfo_path: str, app_ids: Iterable[str]
+) -> dict[str, SteamAppInfo]:
+    """
+    Streams appinfo.vdf over mmap and decodes only the entries for app_ids, every other
+    entry is skipped using its size field without touching its KeyValues data.
+    """
+    wanted_app_ids = {int(app_id) for app_id in app_ids if str(app_id).isdigit()}
+    app_infos: dict[str, SteamAppInfo] = {}
+    if not wanted_app_ids:
+        return app_infos
+
+    with open(appinfo_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            magic, _universe = struct.unpack_from("<II", buffer, 0)
+            offset = 8
+            key_table = None
+            if magic == APPINFO_MAGIC_V29:
+                (string_table_offset,) = INT64.unpack_from(buffer, offset)
+                offset += 8
+                key_table = read_key_table(buffer, string_table_offset)
+            elif magic not in (APPINFO_MAGIC_V27, APPINFO_MAGIC_V28):
+                raise AppInfoParseError(f"Unsupported appinfo.vdf version {magic:#x}")
+
+            # info state, last updated, pics token, text sha1 and change number
+            # precede each entry's KeyValues data
+            entry_header_size = 4 + 4 + 8 + 20 + 4
+            if magic != APPINFO_MAGIC_V27:
+                # sha1 of the binary KeyValues data
+                entry_header_size += 20
+
+            reader = BinaryKeyValuesReader(buffer, key_table)
+            while offset + 8 <= len(buffer):
+                app_id, entry_size = struct.unpack_from("<II", buffer, offset)
+                if app_id == 0:
+                    break
+                entry_start = offset + 8
+                offset = entry_start + entry_size
+                if app_id not in wanted_app_ids:
+                    continue
+
+                values, _ = reader.read_map(entry_start + entry_header_size)
+                appinfo = values.get("appinfo", {})
+                common = appinfo.get("common", {})
+                config = appinfo.get("config", {})
+                app_infos[str(app_id)] = SteamAppInfo(
+                    app_id=str(app_id),
+                    name=common.get("name", ""),
+                    install_dir_name=config.get("installdir", ""),
+                    launch_executable=get_launch_executable(config),
+                )
+
+                wanted_app_ids.discard(app_id)
+                if not wanted_app_ids:
+                    break
+
+    return app_infos
+
+
+class SteamAppInfoIndex:
+    """
+    Persistent appid -> (name, installdir, launch exe) index built from appinfo.vdf.
+    Entries are decoded on first request and the whole index is dropped when
+    appinfo.vdf changes, app ids that are not in the file are remembered as well so
+    they do not trigger a re-read.
+    """
+
+    def __init__(self, index_file: str):
+        self.index_file = index_file
+        self.lock = threading.Lock()
+        self._index: Optional[dict] = None
+
+    def _load_index(self) -> dict:
+        if self._index is not None:
+            return self._index
+        loaded_index: dict = {}
+        if os.path.isfile(self.index_file):
+            try:
+                with open(self.index_file, "r", encoding="utf-8") as file:
+                    index = json.load(file)
+                if index.get("version") == APPINFO_INDEX_FORMAT_VERSION:
+                    loaded_index = index
+            except (OSError, ValueError, AttributeError) as e:
+                logger.log_message(f"Ignoring unreadable Steam appinfo index: {e}")
+        self._index = loaded_index
+        return loaded_index
+
+    def get_app_infos(
+        self, appinfo_path: str, app_ids: Iterable[str]
+    ) -> dict[str, SteamAppInfo]:
+        app_ids = [str(app_id) for app_id in app_ids]
+        try:
+            stat_result = os.stat(appinfo_path)
+        except OSError:
+            return {}
+        stamp = [stat_result.st_mtime_ns, stat_result.st_size]
+
+        with self.lock:
+            index = self._load_index()
+            if index.get("source") != appinfo_path or index.get("stamp") != stamp:
+                index = self._index = {
+                    "version": APPINFO_INDEX_FORMAT_VERSION,
+                    "source": appinfo_path,
+                    "stamp": stamp,
+                    "apps": {},
+                }
+            apps = index["apps"]
+
+            missing_app_ids = [app_id for app_id in app_ids if app_id not in apps]
+            if missing_app_ids:
+                try:
+                    app_infos = read_app_infos(appinfo_path, missing_app_ids)
+                except (OSError, ValueError, IndexError, struct.error) as e:
+                    logger.log_message(f"Failed to read {appinfo_path}: {e}")
+                    app_infos = {}
+                for app_id in missing_app_ids:
+                    app_info = app_infos.get(app_id)
+                    apps[app_id] = (
+                        None
+                        if app_info is None
+                        else [
+                            app_info.name,
+                            app_info.install_dir_name,
+                            app_info.launch_executable,
+                        ]
+                    )
+                os.makedirs(os.path.dirname(self.index_file), exist_ok=True)
+                file_io.write_file_atomically(
+                    json.dumps(index, separators=(",", ":")), self.index_file
+                )
+
+            return {
+                app_id: SteamAppInfo(app_id, *apps[app_id])
+                for app_id in app_ids
+                if apps.get(app_id) is not None
+            }
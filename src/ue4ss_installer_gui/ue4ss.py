@@ -1,22 +1,68 @@
 import os
+import sys
 import pathlib
-import requests
-from typing import List
+import threading
+from typing import Callable, List, Optional
 from dataclasses import dataclass, field
 
+from ue4ss_installer_gui import logger, settings, release_cache
+from ue4ss_installer_gui.directory_probe import DirectoryProbe
+
 
 cached_repo_releases_info = None
 
+cached_release_catalog: Optional["ReleaseCatalog"] = None
+
+# helper archives published next to the UE4SS builds, never offered for install
+EXCLUDED_RELEASE_ASSET_FILE_NAMES = frozenset(
+    ("zcustomgameconfigs.zip", "zmapgenbp.zip")
+)
+
+# version saved for games added before the releases are known
+LATEST_UE4SS_VERSION_TAG = "latest"
+
+# set once the background release fetch has finished, whether or not it got releases
+repo_releases_info_ready_event = threading.Event()
+repo_releases_info_ready_callbacks: list[Callable[[], None]] = []
+repo_releases_info_ready_lock = threading.Lock()
+
+release_cache_store = release_cache.ReleaseCache(settings.RELEASE_CACHE_DIR)
+
 
+# slotted without dataclass(slots=True), which needs Python 3.10, so fields can not
+# have defaults
 @dataclass
 class ReleaseTagAssetInfo:
+    __slots__ = (
+        "file_name",
+        "download_link",
+        "created_at",
+        "size",
+        "digest",
+        "is_dev",
+        "is_standard",
+        "is_excluded",
+    )
     file_name: str
     download_link: str
     created_at: str
+    size: int
+    digest: str
+    is_dev: bool
+    is_standard: bool
+    is_excluded: bool
 
 
 @dataclass
 class ReleaseAssetInfo:
+    __slots__ = (
+        "tag",
+        "is_prerelease",
+        "is_latest",
+        "has_assets",
+        "created_at",
+        "assets",
+    )
     tag: str
     is_prerelease: bool
     is_latest: bool
@@ -32,6 +78,94 @@ class RepositoryReleasesInfo:
     tags: List[ReleaseAssetInfo]
 
 
+class ReleaseCatalog:
+    """
+    Indexes built once per releases load so the configure screen's filter boxes only
+    do dict lookups: tag -> release, (tag, file name) -> asset, the tag lists of each
+    filter mode and every tag's installable file names, newest first, per dev and
+    portable choice.
+    """
+
+    __slots__ = (
+        "releases_info",
+        "releases_by_tag",
+        "assets_by_tag_and_file_name",
+        "all_tags_with_assets",
+        "normal_release_tags_with_assets",
+        "pre_release_tags_with_assets",
+        "installable_file_names",
+    )
+
+    def __init__(self, releases_info: RepositoryReleasesInfo):
+        self.releases_info = releases_info
+        self.releases_by_tag = {
+            tag_info.tag: tag_info for tag_info in releases_info.tags
+        }
+        self.assets_by_tag_and_file_name = {
+            (tag_info.tag, asset.file_name): asset
+            for tag_info in releases_info.tags
+            for asset in tag_info.assets
+        }
+        self.all_tags_with_assets = [
+            tag_info.tag for tag_info in releases_info.tags if tag_info.has_assets
+        ]
+        self.normal_release_tags_with_assets = [
+            tag_info.tag
+            for tag_info in releases_info.tags
+            if tag_info.has_assets and not tag_info.is_prerelease
+        ]
+        self.pre_release_tags_with_assets = [
+            tag_info.tag
+            for tag_info in releases_info.tags
+            if tag_info.has_assets and tag_info.is_prerelease
+        ]
+        # (tag, is dev, is standard or None for both) -> file names
+        self.installable_file_names: dict[tuple, list[str]] = {}
+        for tag_info in releases_info.tags:
+            installable_assets = sorted(
+                (asset for asset in tag_info.assets if not asset.is_excluded),
+                key=lambda asset: asset.created_at,
+                reverse=True,
+            )
+            for is_dev in (True, False):
+                assets = [
+                    asset for asset in installable_assets if asset.is_dev == is_dev
+                ]
+                self.installable_file_names[(tag_info.tag, is_dev, None)] = [
+                    asset.file_name for asset in assets
+                ]
+                for is_standard in (True, False):
+                    self.installable_file_names[(tag_info.tag, is_dev, is_standard)] = [
+                        asset.file_name
+                        for asset in assets
+                        if asset.is_standard == is_standard
+                    ]
+
+    def get_tags_with_assets(self, show_pre_releases: bool) -> list[str]:
+        """
+        Tags offered for the pre-release choice, every tag when there is no normal
+        release with assets, as in an offline catalog of only pre-release downloads.
+        """
+        if show_pre_releases or not self.normal_release_tags_with_assets:
+            return self.all_tags_with_assets
+        return self.normal_release_tags_with_assets
+
+    def get_file_name_to_download_links(self, tag: str) -> dict[str, str]:
+        tag_info = self.releases_by_tag.get(tag)
+        if tag_info is None:
+            return {}
+        return {asset.file_name: asset.download_link for asset in tag_info.assets}
+
+    def get_installable_file_names(
+        self, tag: str, is_dev: bool, is_standard: Optional[bool] = None
+    ) -> list[str]:
+        """
+        File names offered for install, newest first. is_standard None keeps both
+        the standard and the portable builds.
+        """
+        return self.installable_file_names.get((tag, is_dev, is_standard), [])
+
+
 @dataclass
 class ConfigEntry:
     key: str
@@ -45,56 +179,135 @@ class ConfigSection:
     config_entries: List[ConfigEntry] = field(default_factory=list)
 
 
-def cache_repo_releases_info(owner: str, repo: str):
+def fetch_releases(owner: str, repo: str) -> list[dict]:
+    return release_cache_store.fetch_releases(
+        owner,
+        repo,
+        api_url=settings.get_github_api_url_from_settings()
+        or release_cache.GITHUB_API_URL,
+        incremental=settings.get_use_incremental_release_fetch_in_settings(),
+    )
+
+
+def get_releases(owner: str, repo: str, offline: bool = False) -> Optional[list[dict]]:
     """
-    Caches the repo releases information to avoid redundant API calls.
+    Raw releases of the repo. Cached releases within the ttl are used without a
+    request, older ones are revalidated, and when offline or GitHub can not be reached
+    the cached releases are used whatever their age.
     """
-    global cached_repo_releases_info
-    if cached_repo_releases_info is None:
-        cached_repo_releases_info = get_all_release_assets(owner, repo)
+    releases = release_cache_store.get_cached_releases(
+        owner, repo, settings.get_release_cache_ttl_from_settings()
+    )
+    if releases is not None:
+        return releases
+    if not offline:
+        try:
+            return fetch_releases(owner, repo)
+        except Exception as e:
+            logger.log_message(f"Failed to fetch {owner}/{repo} releases: {e}")
+    return release_cache_store.get_cached_releases(owner, repo)
 
 
-def get_file_name_to_download_links_from_tag(tag: str) -> dict[str, str]:
+def cache_repo_releases_info(owner: str, repo: str, offline: bool = False):
     """
-    Given a tag, return a dictionary mapping filenames to their download links.
+    Caches the repo releases information to avoid redundant API calls. Offline, only
+    assets already in the release cache are listed so every listed file can be
+    installed.
+    """
+    if cached_repo_releases_info is not None:
+        return
+    releases = get_releases(owner, repo, offline)
+    if releases is None:
+        return
+    available_assets = release_cache_store.get_cached_asset_names() if offline else None
+    releases_info = build_repository_releases_info(
+        owner, repo, releases, available_assets
+    )
+    set_cached_repo_releases_info(releases_info)
+
+
+def set_cached_repo_releases_info(releases_info: RepositoryReleasesInfo):
+    global cached_repo_releases_info, cached_release_catalog
+    cached_release_catalog = ReleaseCatalog(releases_info)
+    cached_repo_releases_info = releases_info
+
+
+def start_caching_repo_releases_info(
+    owner: str, repo: str, offline: bool = False
+) -> threading.Thread:
     """
-    global cached_repo_releases_info
-    if cached_repo_releases_info is None:
+    Caches the repo releases information on a background thread so startup does not
+    wait on GitHub, readiness is published through repo_releases_info_ready_event.
+    """
+
+    def cache_in_background():
+        try:
+            cache_repo_releases_info(owner, repo, offline)
+        except Exception as e:
+            logger.log_message(f"Failed to load {owner}/{repo} releases: {e}")
+        finally:
+            with repo_releases_info_ready_lock:
+                repo_releases_info_ready_event.set()
+                callbacks = list(repo_releases_info_ready_callbacks)
+                repo_releases_info_ready_callbacks.clear()
+            for callback in callbacks:
+                callback()
+
+    thread = threading.Thread(
+        target=cache_in_background, daemon=True, name="release_fetch"
+    )
+    thread.start()
+    return thread
+
+
+def is_loading_repo_releases_info() -> bool:
+    return not repo_releases_info_ready_event.is_set()
+
+
+def add_repo_releases_info_ready_callback(callback: Callable[[], None]):
+    """
+    Runs callback once releases are loaded, right away if they already are. It runs
+    on the fetch thread, so UI updates go through ui_tasks.
+    """
+    with repo_releases_info_ready_lock:
+        if not repo_releases_info_ready_event.is_set():
+            repo_releases_info_ready_callbacks.append(callback)
+            return
+    callback()
+
+
+def get_release_catalog() -> ReleaseCatalog:
+    if cached_release_catalog is None:
         raise Exception(
             "Repo release info is not cached. Please call cache_repo_releases_info first."
         )
+    return cached_release_catalog
 
-    for tag_info in cached_repo_releases_info.tags:
-        if tag_info.tag == tag:
-            return {asset.file_name: asset.download_link for asset in tag_info.assets}
 
-    return {}
+def get_file_name_to_download_links_from_tag(tag: str) -> dict[str, str]:
+    """
+    Given a tag, return a dictionary mapping filenames to their download links.
+    """
+    return get_release_catalog().get_file_name_to_download_links(tag)
 
 
 def get_all_release_assets(owner: str, repo: str) -> RepositoryReleasesInfo:
     """
     Fetches all release tags with metadata for a GitHub repo, sorted from newest to oldest.
     """
-    url = f"https://api.github.com/repos/{owner}/{repo}/releases"
-    headers = {"Accept": "application/vnd.github.v3+json"}
+    return build_repository_releases_info(owner, repo, fetch_releases(owner, repo))
 
-    all_releases = []
-    page = 1
-
-    while True:
-        response = requests.get(
-            url, headers=headers, params={"page": page, "per_page": 100}
-        )
-        if response.status_code != 200:
-            raise Exception(
-                f"GitHub API error: {response.status_code} - {response.text}"
-            )
-        releases = response.json()
-        if not releases:
-            break
-        all_releases.extend(releases)
-        page += 1
 
+def build_repository_releases_info(
+    owner: str,
+    repo: str,
+    all_releases: list[dict],
+    available_assets: Optional[set[tuple[str, str]]] = None,
+) -> RepositoryReleasesInfo:
+    """
+    Release tags sorted from newest to oldest, with available_assets only the listed
+    (tag, file name) assets are kept.
+    """
     sorted_releases = sorted(
         all_releases, key=lambda r: r.get("created_at", ""), reverse=True
     )
@@ -108,18 +321,28 @@ def get_all_release_assets(owner: str, repo: str) -> RepositoryReleasesInfo:
             break
 
     for release in sorted_releases:
-        tag = release.get("tag_name")
+        tag_name = release.get("tag_name")
+        if not isinstance(tag_name, str):
+            continue
+        # tags and file names are dict keys of the catalog and repeat across it
+        tag = sys.intern(tag_name)
         is_prerelease = release.get("prerelease", False)
         created_at = release.get("created_at", "")
         assets_list = release.get("assets", [])
 
         assets = [
             ReleaseTagAssetInfo(
-                file_name=asset["name"],
+                file_name=sys.intern(asset["name"]),
                 download_link=asset["browser_download_url"],
                 created_at=asset["created_at"],
+                size=asset.get("size", 0),
+                digest=asset.get("digest") or "",
+                is_dev="dev" in asset["name"].lower(),
+                is_standard="Standard" in asset["name"],
+                is_excluded=asset["name"].lower() in EXCLUDED_RELEASE_ASSET_FILE_NAMES,
             )
             for asset in assets_list
+            if available_assets is None or (tag, asset["name"]) in available_assets
         ]
 
         tag_infos.append(
@@ -136,37 +359,75 @@ def get_all_release_assets(owner: str, repo: str) -> RepositoryReleasesInfo:
     return RepositoryReleasesInfo(owner=owner, repo=repo, tags=tag_infos)
 
 
+def get_release_asset_path(tag: str, file_name: str) -> str:
+    """
+    Path of a release asset in the release cache, downloaded first if needed.
+    """
+    asset = get_release_catalog().assets_by_tag_and_file_name.get((tag, file_name))
+    if asset is None:
+        raise RuntimeError(f"No release asset {file_name} in {tag}")
+    return release_cache_store.download_asset(
+        asset.download_link,
+        tag,
+        file_name,
+        size=asset.size,
+        digest=asset.digest,
+    )
+
+
+def is_release_catalog_available() -> bool:
+    return cached_release_catalog is not None and bool(
+        cached_release_catalog.all_tags_with_assets
+    )
+
+
 def get_default_ue4ss_version_tag() -> str:
-    if cached_repo_releases_info is None:
-        return "latest"
-    else:
-        return get_normal_release_tags_with_assets()[0]
+    if cached_release_catalog is None:
+        return LATEST_UE4SS_VERSION_TAG
+    normal_release_tags = get_normal_release_tags_with_assets()
+    if not normal_release_tags:
+        return LATEST_UE4SS_VERSION_TAG
+    return normal_release_tags[0]
 
 
-def is_ue4ss_installed(game_directory: pathlib.Path) -> bool:
+def resolve_latest_ue4ss_versions_in_settings():
+    """
+    Games found before the releases loaded were saved with the "latest" placeholder,
+    they get the concrete default tag once the catalog has one.
+    """
+    default_tag = get_default_ue4ss_version_tag()
+    if default_tag == LATEST_UE4SS_VERSION_TAG:
+        return
+    with settings.edit_settings() as loaded_settings:
+        for game_entry in loaded_settings.get("games", []):
+            if game_entry.get("ue4ss_version") == LATEST_UE4SS_VERSION_TAG:
+                game_entry["ue4ss_version"] = default_tag
+
+
+def is_ue4ss_installed(
+    game_directory: pathlib.Path, probe: Optional[DirectoryProbe] = None
+) -> bool:
     """
     Checks if UE4SS is installed in the provided game directory.
     """
-    if os.path.isdir(game_directory):
-        for dir_one_level_in in game_directory.iterdir():
-            if not dir_one_level_in.is_dir():
-                continue
-
-            win64_dir = dir_one_level_in / "Binaries" / "Win64"
-
-            if not win64_dir.is_dir():
-                continue
+    if probe is None:
+        probe = DirectoryProbe()
+    for dir_one_level_in in probe.get_sub_dirs(game_directory):
+        win64_dir = dir_one_level_in / "Binaries" / "Win64"
 
-            if (win64_dir / "dwmapi.dll").is_file():
-                if (win64_dir / "ue4ss" / "ue4ss.dll").is_file():
-                    return True
-                if (win64_dir / "ue4ss.dll").is_file():
-                    return True
+        if not probe.is_dir(win64_dir):
+            continue
 
-            if (win64_dir / "xinput1_3.dll").is_file() and (
-                win64_dir / "UE4SS-settings.ini"
-            ).is_file():
+        if probe.is_file(win64_dir / "dwmapi.dll"):
+            if probe.is_file(win64_dir / "ue4ss" / "ue4ss.dll"):
                 return True
+            if probe.is_file(win64_dir / "ue4ss.dll"):
+                return True
+
+        if probe.is_file(win64_dir / "xinput1_3.dll") and probe.is_file(
+            win64_dir / "UE4SS-settings.ini"
+        ):
+            return True
     return False
 
 
@@ -174,51 +435,21 @@ def get_all_tags_with_assets() -> List[str]:
     """
     Returns all tag names that have associated assets (regardless of release type).
     """
-    global cached_repo_releases_info
-    if cached_repo_releases_info is None:
-        raise Exception(
-            "Repo release info is not cached. Please call cache_repo_releases_info first."
-        )
-
-    return [
-        tag_info.tag
-        for tag_info in cached_repo_releases_info.tags
-        if tag_info.has_assets
-    ]
+    return get_release_catalog().all_tags_with_assets
 
 
 def get_pre_release_tags_with_assets() -> List[str]:
     """
     Returns all prerelease tag names that have associated assets.
     """
-    global cached_repo_releases_info
-    if cached_repo_releases_info is None:
-        raise Exception(
-            "Repo release info is not cached. Please call cache_repo_releases_info first."
-        )
-
-    return [
-        tag_info.tag
-        for tag_info in cached_repo_releases_info.tags
-        if tag_info.has_assets and tag_info.is_prerelease
-    ]
+    return get_release_catalog().pre_release_tags_with_assets
 
 
 def get_normal_release_tags_with_assets() -> List[str]:
     """
     Returns all normal (non-prerelease) tag names that have associated assets.
     """
-    global cached_repo_releases_info
-    if cached_repo_releases_info is None:
-        raise Exception(
-            "Repo release info is not cached. Please call cache_repo_releases_info first."
-        )
-
-    return [
-        tag_info.tag
-        for tag_info in cached_repo_releases_info.tags
-        if tag_info.has_assets and not tag_info.is_prerelease
-    ]
+    return get_release_catalog().normal_release_tags_with_assets
 
 
 def parse_ue4ss_settings_file(filepath: str) -> List[ConfigSection]:
@@ -281,9 +512,7 @@ def test_ue4ss_settings_print_out(sections: List[ConfigSection]):
 
 
 def get_ue4ss_settings_path(game_directory: pathlib.Path) -> pathlib.Path:
-    from ue4ss_installer_gui.screens.configure_game import get_exe_dir_from_game_dir
-
-    exe_dir = get_exe_dir_from_game_dir(pathlib.Path(game_directory))
+    exe_dir = settings.get_game_exe_dir(pathlib.Path(game_directory))
     path_one = os.path.normpath(f"{exe_dir}/ue4ss/UE4SS-settings.ini")
     path_two = os.path.normpath(f"{exe_dir}/UE4SS-settings.ini")
     if os.path.isfile(path_one):
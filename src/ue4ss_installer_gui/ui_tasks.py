@@ -0,0 +1,34 @@
+import threading
+from typing import Callable, Hashable, Optional
+
+from ue4ss_installer_gui import logger
+
+
+# Dear PyGui items are only touched from the render loop, background threads post
+# their updates here and main.py runs them before each frame
+ui_task_lock = threading.Lock()
+pending_ui_tasks: list[tuple[Callable, tuple]] = []
+# tasks posted with a coalesce key run once per frame with their latest arguments
+pending_coalesced_ui_tasks: dict[Hashable, tuple[Callable, tuple]] = {}
+
+
+def post_ui_task(func: Callable, *args, coalesce_key: Optional[Hashable] = None):
+    with ui_task_lock:
+        if coalesce_key is None:
+            pending_ui_tasks.append((func, args))
+        else:
+            pending_coalesced_ui_tasks.pop(coalesce_key, None)
+            pending_coalesced_ui_tasks[coalesce_key] = (func, args)
+
+
+def run_pending_ui_tasks():
+    with ui_task_lock:
+        tasks = pending_ui_tasks + list(pending_coalesced_ui_tasks.values())
+        pending_ui_tasks.clear()
+        pending_coalesced_ui_tasks.clear()
+
+    for func, args in tasks:
+        try:
+            func(*args)
+        except Exception as e:
+            logger.log_message(f"UI task {getattr(func, '__name__', func)} failed: {e}")
@@ -1,17 +1,119 @@
-import os
+import fnmatch
 import pathlib
-from typing import List, Union
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, Optional, Union
+
+from ue4ss_installer_gui.directory_probe import DirectoryProbe
 
 
 MAX_DEPTH = 1
 
+DEFAULT_DISCOVERY_MAX_DEPTH = 4
+
+# directory entries listed before a discovery walk gives up on the rest of its tree
+DEFAULT_DISCOVERY_ENTRY_BUDGET = 50_000
+
+# fnmatch patterns for dir names a discovery walk never descends into, matched
+# case insensitively
+DEFAULT_DISCOVERY_IGNORE_PATTERNS = (
+    ".*",
+    "$RECYCLE.BIN",
+    "System Volume Information",
+    "node_modules",
+    "__pycache__",
+    "steamapps/downloading",
+    "steamapps/shadercache",
+    "steamapps/temp",
+    "steamapps/workshop",
+)
+
+MAX_EXE_DIR_SEARCH_DEPTH = 5
+
+MAIN_EXE_DIR_NAMES = ("Win64", "WinGDK")
+
+# Engine/Binaries/Win64 holds engine redistributables rather than the game exe, so
+# Engine is skipped at every depth
+EXE_DIR_SEARCH_ALWAYS_PRUNED_DIR_NAMES = frozenset(("engine",))
+
+# large subtrees below a game's project folder that never hold the main exe dir,
+# the game root's own children are still searched since a project folder can
+# share one of these names
+EXE_DIR_SEARCH_PRUNED_DIR_NAMES = frozenset(
+    name.lower()
+    for name in (
+        "Engine",
+        "Content",
+        "Saved",
+        "Intermediate",
+        "DerivedDataCache",
+        "Config",
+        "Localization",
+        "Movies",
+        "Plugins",
+        "Mods",
+        "ThirdParty",
+        "Source",
+        "Build",
+    )
+)
+
+
+def iter_main_exe_dirs_in_dir_tree(
+    directory: pathlib.Path,
+    exe_dir_names: tuple[str, ...] = MAIN_EXE_DIR_NAMES,
+    max_depth: int = MAX_EXE_DIR_SEARCH_DEPTH,
+    probe: Optional[DirectoryProbe] = None,
+) -> Iterator[pathlib.Path]:
+    """
+    Breadth first search for Binaries/<exe_dir_name> dirs, shallowest first, skipping
+    subtrees like Content and Saved that can hold tens of thousands of files.
+    """
+    if probe is None:
+        probe = DirectoryProbe()
+    exe_dir_name_keys = [name.lower() for name in exe_dir_names]
+    current_level = [pathlib.Path(directory)]
+
+    for depth in range(max_depth):
+        pruned_dir_names = (
+            EXE_DIR_SEARCH_ALWAYS_PRUNED_DIR_NAMES
+            if depth == 0
+            else EXE_DIR_SEARCH_PRUNED_DIR_NAMES
+        )
+        next_level = []
+        for current_dir in current_level:
+            for sub_dir in probe.get_sub_dirs(current_dir, follow_symlinks=False):
+                sub_dir_name = sub_dir.name.lower()
+                if sub_dir_name == "binaries":
+                    binaries_sub_dirs = {
+                        binaries_sub_dir.name.lower(): binaries_sub_dir
+                        for binaries_sub_dir in probe.get_sub_dirs(sub_dir)
+                    }
+                    for exe_dir_name_key in exe_dir_name_keys:
+                        if exe_dir_name_key in binaries_sub_dirs:
+                            yield binaries_sub_dirs[exe_dir_name_key]
+                elif sub_dir_name not in pruned_dir_names:
+                    next_level.append(sub_dir)
+        current_level = sorted(next_level)
+
+
+def find_main_exe_dir(
+    directory: pathlib.Path,
+    max_depth: int = MAX_EXE_DIR_SEARCH_DEPTH,
+    probe: Optional[DirectoryProbe] = None,
+) -> Optional[pathlib.Path]:
+    return next(
+        iter_main_exe_dirs_in_dir_tree(directory, max_depth=max_depth, probe=probe),
+        None,
+    )
+
 
 def get_all_win_gdk_dirs_in_dir_tree(directory: pathlib.Path) -> List[pathlib.Path]:
-    return [p for p in directory.rglob("*") if p.is_dir() and p.name == "WinGDK"]
+    return list(iter_main_exe_dirs_in_dir_tree(directory, ("WinGDK",)))
 
 
 def get_all_win_64_dirs_in_dir_tree(directory: pathlib.Path) -> List[pathlib.Path]:
-    return [p for p in directory.rglob("*") if p.is_dir() and p.name == "Win64"]
+    return list(iter_main_exe_dirs_in_dir_tree(directory, ("Win64",)))
 
 
 def get_all_main_exe_dirs_in_dir_tree(directory: pathlib.Path) -> List[pathlib.Path]:
@@ -38,23 +140,22 @@ def does_root_dir_contain_exe(directory: pathlib.Path) -> bool:
 
 
 def collect_dirs_with_depth(
-    root_dir: pathlib.Path, max_depth: int
+    root_dir: pathlib.Path, max_depth: int, probe: Optional[DirectoryProbe] = None
 ) -> list[pathlib.Path]:
+    if probe is None:
+        probe = DirectoryProbe()
     all_dirs = []
 
     def walk_dir(current_path, current_depth):
         if current_depth > max_depth:
             return
-        try:
-            entries = list(os.scandir(current_path))
-        except Exception as e:
-            print(f"Skipping {current_path}: {e}")
+        if probe.get_entries(current_path) is None:
+            print(f"Skipping {current_path}: not a readable directory")
             return
 
         all_dirs.append(current_path)
-        for entry in entries:
-            if entry.is_dir(follow_symlinks=False):
-                walk_dir(pathlib.Path(entry.path), current_depth + 1)
+        for sub_dir in probe.get_sub_dirs(current_path, follow_symlinks=False):
+            walk_dir(sub_dir, current_depth + 1)
 
     walk_dir(root_dir, 0)
     return all_dirs
@@ -62,68 +163,152 @@ def collect_dirs_with_depth(
 
 def is_unreal_game_dir(
     root_dir: Union[str, pathlib.Path],
-    max_depth: int = 1,
+    max_depth: int = MAX_DEPTH,
     include_uninstalled: bool = True,
+    probe: Optional[DirectoryProbe] = None,
 ) -> bool:
-    all_dirs = collect_dirs_with_depth(pathlib.Path(root_dir), max_depth)
+    if probe is None:
+        probe = DirectoryProbe()
+    all_dirs = collect_dirs_with_depth(pathlib.Path(root_dir), max_depth, probe)
 
     for _, directory in enumerate(all_dirs):
-        if does_directory_contain_unreal_game(directory):
+        if does_directory_contain_unreal_game(directory, probe):
             if include_uninstalled:
                 return True
-            elif any(f.suffix.lower() == ".exe" for f in directory.glob("*.exe")):
+            elif probe.has_file_with_suffix(directory, ".exe"):
                 return True
     return False
 
 
-def get_all_unreal_game_directories_in_directory_tree(
-    root_directory: Union[str, pathlib.Path],
-    include_uninstalled_existing_game_dirs: bool = True,
-    max_depth: int = MAX_DEPTH,
-) -> List[str]:
-    unreal_game_dirs: List[str] = []
-    root = pathlib.Path(root_directory)
-
-    def recursive_scan(current_dir: pathlib.Path, depth: int):
-        if depth > max_depth:
-            return
+@dataclass
+class DiscoveryResult:
+    game_dirs: List[str] = field(default_factory=list)
+    visited_dir_count: int = 0
+    visited_entry_count: int = 0
+    budget_exhausted: bool = False
+
+
+def is_ignored_dir(directory: pathlib.Path, ignore_patterns: Iterable[str]) -> bool:
+    """
+    Patterns without a slash match the dir name, patterns with one match the tail of
+    the path, so "steamapps/temp" skips only the temp dir of a Steam library.
+    """
+    name = directory.name.lower()
+    tail = f"{directory.parent.name}/{directory.name}".lower()
+    for pattern in ignore_patterns:
+        pattern = pattern.lower()
+        if fnmatch.fnmatchcase(tail if "/" in pattern else name, pattern):
+            return True
+    return False
 
-        if is_unreal_game_dir(
-            current_dir,
-            max_depth=1,
-            include_uninstalled=include_uninstalled_existing_game_dirs,
-        ):
-            unreal_game_dirs.append(str(current_dir))
 
-    recursive_scan(root, 0)
-    return unreal_game_dirs
+def discover_unreal_game_directories(
+    root_directory: Union[str, pathlib.Path],
+    include_uninstalled_existing_game_dirs: bool = True,
+    max_depth: int = DEFAULT_DISCOVERY_MAX_DEPTH,
+    entry_budget: int = DEFAULT_DISCOVERY_ENTRY_BUDGET,
+    ignore_patterns: Iterable[str] = DEFAULT_DISCOVERY_IGNORE_PATTERNS,
+    probe: Optional[DirectoryProbe] = None,
+) -> DiscoveryResult:
+    """
+    Breadth first walk of a folder of games such as D:/Games. A dir recognized as a
+    game root is reported and not descended into, so the walk never lists the Content
+    and Engine trees of the games it finds. The walk stops at max_depth below the root
+    or once entry_budget directory entries have been listed.
+    """
+    if probe is None:
+        probe = DirectoryProbe()
+    ignore_patterns = tuple(ignore_patterns)
+    result = DiscoveryResult()
+    queue = deque([(pathlib.Path(root_directory), 0)])
+
+    while queue:
+        if result.visited_entry_count >= entry_budget:
+            result.budget_exhausted = True
+            break
+        current_dir, depth = queue.popleft()
+        entries = probe.get_entries(current_dir)
+        if entries is None:
+            if depth == 0:
+                print(f"Skipping {current_dir}: not a readable directory")
+            continue
+        result.visited_dir_count += 1
+        result.visited_entry_count += len(entries)
+
+        if does_directory_contain_unreal_game(current_dir, probe):
+            if include_uninstalled_existing_game_dirs or probe.has_file_with_suffix(
+                current_dir, ".exe"
+            ):
+                result.game_dirs.append(str(current_dir))
+            continue
+
+        if depth >= max_depth:
+            continue
+        for sub_dir in sorted(probe.get_sub_dirs(current_dir, follow_symlinks=False)):
+            if not is_ignored_dir(sub_dir, ignore_patterns):
+                queue.append((sub_dir, depth + 1))
+
+    return result
 
 
-def does_dir_contain_engine_binaries_folder(directory: pathlib.Path) -> bool:
-    return (directory / "Engine" / "Binaries").is_dir()
+def get_all_unreal_game_directories_in_directory_tree(
+    root_directory: Union[str, pathlib.Path],
+    include_uninstalled_existing_game_dirs: bool = True,
+    max_depth: int = DEFAULT_DISCOVERY_MAX_DEPTH,
+    probe: Optional[DirectoryProbe] = None,
+    entry_budget: int = DEFAULT_DISCOVERY_ENTRY_BUDGET,
+    ignore_patterns: Iterable[str] = DEFAULT_DISCOVERY_IGNORE_PATTERNS,
+) -> List[str]:
+    return discover_unreal_game_directories(
+        root_directory,
+        include_uninstalled_existing_game_dirs=include_uninstalled_existing_game_dirs,
+        max_depth=max_depth,
+        entry_budget=entry_budget,
+        ignore_patterns=ignore_patterns,
+        probe=probe,
+    ).game_dirs
+
+
+def does_dir_contain_engine_binaries_folder(
+    directory: pathlib.Path, probe: Optional[DirectoryProbe] = None
+) -> bool:
+    if probe is None:
+        return (directory / "Engine" / "Binaries").is_dir()
+    return probe.is_dir(directory / "Engine" / "Binaries")
 
 
-def does_dir_contain_engine_shared_folder(directory: pathlib.Path) -> bool:
-    return (directory / "Engine" / "Shared").is_dir()
+def does_dir_contain_engine_shared_folder(
+    directory: pathlib.Path, probe: Optional[DirectoryProbe] = None
+) -> bool:
+    if probe is None:
+        return (directory / "Engine" / "Shared").is_dir()
+    return probe.is_dir(directory / "Engine" / "Shared")
 
 
-def does_dir_contain_unreal_manifest_file(directory: pathlib.Path) -> bool:
-    return (directory / "Manifest_NonUFSFiles_Win64.txt").is_file()
+def does_dir_contain_unreal_manifest_file(
+    directory: pathlib.Path, probe: Optional[DirectoryProbe] = None
+) -> bool:
+    if probe is None:
+        return (directory / "Manifest_NonUFSFiles_Win64.txt").is_file()
+    return probe.is_file(directory / "Manifest_NonUFSFiles_Win64.txt")
 
 
-def does_directory_contain_unreal_game(directory: pathlib.Path) -> bool:
-    checks = [
-        does_dir_contain_engine_binaries_folder(directory),
-        does_dir_contain_engine_shared_folder(directory),
-        does_dir_contain_unreal_manifest_file(directory),
-    ]
-    if not any(checks):
-        for subdir in ("Windows", "WindowsNoEditor"):
-            sub_path = directory / subdir
-            checks.extend(
-                [
-                    does_dir_contain_engine_binaries_folder(sub_path),
-                    does_dir_contain_engine_shared_folder(sub_path),
-                ]
-            )
-    return any(checks)
+def does_directory_contain_unreal_game(
+    directory: pathlib.Path, probe: Optional[DirectoryProbe] = None
+) -> bool:
+    if probe is None:
+        probe = DirectoryProbe()
+    directory = pathlib.Path(directory)
+    if (
+        does_dir_contain_engine_binaries_folder(directory, probe)
+        or does_dir_contain_engine_shared_folder(directory, probe)
+        or does_dir_contain_unreal_manifest_file(directory, probe)
+    ):
+        return True
+    for subdir in ("Windows", "WindowsNoEditor"):
+        sub_path = directory / subdir
+        if does_dir_contain_engine_binaries_folder(
+            sub_path, probe
+        ) or does_dir_contain_engine_shared_folder(sub_path, probe):
+            return True
+    return False
@@ -0,0 +1,110 @@
+from typing import Any, Iterator, Optional, TypeVar, Union, overload
+
+
+VDF_ESCAPES = {"n": "\n", "t": "\t", "\\": "\\", '"': '"'}
+
+
+T = TypeVar("T")
+
+
+class VDFParseError(ValueError):
+    pass
+
+
+def iter_vdf_tokens(text: str) -> Iterator[str]:
+    """
+    Yields the quoted strings, bare words and braces of Valve's text KeyValues format,
+    skipping // comments and [$PLATFORM] conditionals.
+    """
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if char.isspace():
+            index += 1
+        elif char in "{}":
+            yield char
+            index += 1
+        elif text.startswith("//", index):
+            newline_index = text.find("\n", index)
+            index = length if newline_index == -1 else newline_index + 1
+        elif char == "[":
+            closing_index = text.find("]", index)
+            index = length if closing_index == -1 else closing_index + 1
+        elif char == '"':
+            index += 1
+            parts = []
+            while index < length and text[index] != '"':
+                if text[index] == "\\" and index + 1 < length:
+                    escaped = text[index + 1]
+                    parts.append(VDF_ESCAPES.get(escaped, "\\" + escaped))
+                    index += 2
+                else:
+                    parts.append(text[index])
+                    index += 1
+            if index >= length:
+                raise VDFParseError("Unterminated quoted string in vdf text")
+            yield "".join(parts)
+            index += 1
+        else:
+            start = index
+            while (
+                index < length
+                and not text[index].isspace()
+                and text[index] not in '{}"'
+            ):
+                index += 1
+            yield text[start:index]
+
+
+def parse_vdf_text(text: str) -> dict:
+    """
+    Parses text KeyValues (libraryfolders.vdf, appmanifest_*.acf) into nested dicts.
+    Keys are kept as written, when a key repeats the last value wins.
+    """
+    root: dict = {}
+    stack = [root]
+    pending_key: Optional[str] = None
+
+    for token in iter_vdf_tokens(text):
+        if token == "{":
+            if pending_key is None:
+                raise VDFParseError("Unexpected '{' without a key in vdf text")
+            child: dict = {}
+            stack[-1][pending_key] = child
+            stack.append(child)
+            pending_key = None
+        elif token == "}":
+            if pending_key is not None or len(stack) == 1:
+                raise VDFParseError("Unexpected '}' in vdf text")
+            stack.pop()
+        elif pending_key is None:
+            pending_key = token
+        else:
+            stack[-1][pending_key] = token
+            pending_key = None
+
+    if len(stack) != 1 or pending_key is not None:
+        raise VDFParseError("Unexpected end of vdf text")
+    return root
+
+
+@overload
+def get_case_insensitive(mapping: dict, key: str) -> Optional[Any]: ...
+
+
+@overload
+def get_case_insensitive(mapping: dict, key: str, default: T) -> Union[Any, T]: ...
+
+
+def get_case_insensitive(mapping: dict, key: str, default=None):
+    """
+    Valve files are not consistent about key case ("installdir" vs "InstallDir").
+    """
+    if key in mapping:
+        return mapping[key]
+    key_lower = key.lower()
+    for mapping_key, value in mapping.items():
+        if mapping_key.lower() == key_lower:
+            return value
+    return default